@@ -1,7 +1,20 @@
 #!/usr/bin/env python3
 
+import hashlib
+import math
+import pickle
 import statistics
-from typing import Any
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from typing import Any, Hashable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the score kernel falls back to pure Python
+    np = None
 
 ANALYSIS_SECRETS = {
     "weight_factor": 1.25,
@@ -9,17 +22,425 @@ ANALYSIS_SECRETS = {
     "penalty_factor": 0.95
 }
 
+_MISSING = object()
+_FINGERPRINT_CHUNK = 8192
+# Values whose repr identifies them, so a repr can stand in for them in a cache key
+_FINGERPRINT_TYPES = (type(None), bool, int, float, str)
+
+BONUS_MULTIPLIER = 1.1
+PENALTY_CUTOFF = 70
+
+def enhanced_score(base_score: float, alpha: float, beta: float, gamma: float, weight_factor: float,
+                   bonus_threshold: float, penalty_factor: float) -> float:
+    """Enhanced score for one record; the vectorized kernel mirrors this formula"""
+    score = base_score * alpha + beta * weight_factor * base_score + gamma * 10
+    if base_score >= bonus_threshold:
+        return score * BONUS_MULTIPLIER
+    if base_score < PENALTY_CUTOFF:
+        return score * penalty_factor
+    return score
+
+def _fingerprint_column(records: Sequence[Any], key: str) -> Optional[bytes]:
+    """Encode one field across records, marking absent keys; None if a value cannot be fingerprinted"""
+    values = []
+    for record in records:
+        value = record.get(key, _MISSING)
+        if value is _MISSING:
+            values.append(())
+        elif type(value) in _FINGERPRINT_TYPES:
+            values.append(value)
+        else:
+            return None
+    return repr(values).encode()
+
+def encode_categories(categories: Iterable[Any]) -> tuple[list[int], list[Any]]:
+    """Map category labels to dense integer codes, returning the codes and the label per code"""
+    codes = []
+    index: dict[Any, int] = {}
+    for category in categories:
+        code = index.get(category)
+        if code is None:
+            code = index[category] = len(index)
+        codes.append(code)
+    return codes, list(index)
+
+def enhanced_score_kernel(scores: Sequence[float], category_codes: Sequence[int], n_categories: int,
+                          parameter_sets: Sequence[dict[str, float]]) -> dict[str, Any]:
+    """Compute enhanced scores and per-category means for every parameter set at once
+    
+    Returns arrays shaped (parameter sets, records) and (parameter sets, categories);
+    categories with no records have a mean of NaN.
+    """
+    if np is not None:
+        base = np.asarray(scores, dtype=np.float64)
+        codes = np.asarray(category_codes, dtype=np.intp)
+        column = lambda key: np.array([params[key] for params in parameter_sets], dtype=np.float64)[:, None]
+        
+        alpha, beta, gamma = column("alpha"), column("beta"), column("gamma")
+        weight_factor, bonus_threshold = column("weight_factor"), column("bonus_threshold")
+        penalty_factor = column("penalty_factor")
+        
+        enhanced = base * alpha + beta * weight_factor * base + gamma * 10
+        enhanced = np.where(base >= bonus_threshold, enhanced * BONUS_MULTIPLIER,
+                            np.where(base < PENALTY_CUTOFF, enhanced * penalty_factor, enhanced))
+        
+        n_sets = len(parameter_sets)
+        offsets = codes + (np.arange(n_sets) * n_categories)[:, None]
+        sums = np.bincount(offsets.ravel(), weights=enhanced.ravel(), minlength=n_sets * n_categories)
+        counts = np.bincount(codes, minlength=n_categories)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums.reshape(n_sets, n_categories) / counts
+        return {"enhanced_scores": enhanced, "category_means": means}
+    
+    counts = [0] * n_categories
+    for code in category_codes:
+        counts[code] += 1
+    
+    all_enhanced, all_means = [], []
+    for params in parameter_sets:
+        alpha, beta, gamma = params["alpha"], params["beta"], params["gamma"]
+        weight_factor, bonus_threshold = params["weight_factor"], params["bonus_threshold"]
+        penalty_factor = params["penalty_factor"]
+        
+        enhanced = []
+        sums = [0.0] * n_categories
+        for base_score, code in zip(scores, category_codes):
+            score = enhanced_score(base_score, alpha, beta, gamma, weight_factor, bonus_threshold, penalty_factor)
+            enhanced.append(score)
+            sums[code] += score
+        
+        all_enhanced.append(enhanced)
+        all_means.append([total / count if count else math.nan for total, count in zip(sums, counts)])
+    
+    return {"enhanced_scores": all_enhanced, "category_means": all_means}
+
+class StreamingStats:
+    """Single-pass accumulator for count, mean, variance, min, max and median"""
+    
+    def __init__(self, exact_median: bool = False, compression: int = 100) -> None:
+        self.count: int = 0
+        self.mean: float = 0.0
+        self._m2: float = 0.0
+        self.min_score: Optional[float] = None
+        self.max_score: Optional[float] = None
+        self.exact_median = exact_median
+        self.compression = compression
+        self._values: list[float] = []
+        self._centroids: list[list[float]] = []
+        self._buffer: list[float] = []
+    
+    def add(self, value: float) -> None:
+        """Feed a single value into the accumulator"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        
+        if self.min_score is None or value < self.min_score:
+            self.min_score = value
+        if self.max_score is None or value > self.max_score:
+            self.max_score = value
+        
+        if self.exact_median:
+            self._values.append(value)
+        else:
+            self._buffer.append(value)
+            if len(self._buffer) >= self.compression * 5:
+                self._compress()
+    
+    def update(self, values: Iterable[float]) -> "StreamingStats":
+        """Feed many values into the accumulator"""
+        for value in values:
+            self.add(value)
+        return self
+    
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """Combine another shard's accumulator into this one"""
+        if other.count == 0:
+            return self
+        
+        combined = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / combined
+        self.mean += delta * other.count / combined
+        self.count = combined
+        
+        self.min_score = other.min_score if self.min_score is None else min(self.min_score, other.min_score)
+        self.max_score = other.max_score if self.max_score is None else max(self.max_score, other.max_score)
+        
+        if self.exact_median and other.exact_median:
+            self._values.extend(other._values)
+        else:
+            if self.exact_median:
+                self._buffer.extend(self._values)
+                self._values = []
+                self.exact_median = False
+            self._buffer.extend(other._values)
+            self._buffer.extend(other._buffer)
+            self._centroids.extend([list(c) for c in other._centroids])
+            self._compress()
+        return self
+    
+    @property
+    def std_dev(self) -> float:
+        """Sample standard deviation, 0 for fewer than two values"""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0
+    
+    @property
+    def median(self) -> Optional[float]:
+        """Exact median when requested, otherwise a t-digest style estimate"""
+        if self.count == 0:
+            return None
+        if self.exact_median:
+            return statistics.median(self._values)
+        return self.quantile(0.5)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-th quantile from the compressed centroids"""
+        if self.exact_median:
+            if not self._values:
+                return None
+            ordered = sorted(self._values)
+            position = q * (len(ordered) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(ordered) - 1)
+            return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+        
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+        
+        target = q * self.count
+        cumulative = 0.0
+        for i, (mean, weight) in enumerate(self._centroids):
+            midpoint = cumulative + weight / 2
+            if target <= midpoint:
+                if i == 0:
+                    return self.min_score + (mean - self.min_score) * target / midpoint if midpoint else mean
+                prev_mean, prev_weight = self._centroids[i - 1]
+                prev_midpoint = cumulative - prev_weight / 2
+                return prev_mean + (mean - prev_mean) * (target - prev_midpoint) / (midpoint - prev_midpoint)
+            cumulative += weight
+        
+        last_mean, last_weight = self._centroids[-1]
+        last_midpoint = self.count - last_weight / 2
+        remaining = self.count - last_midpoint
+        return last_mean + (self.max_score - last_mean) * (target - last_midpoint) / remaining if remaining else last_mean
+    
+    def _compress(self) -> None:
+        """Fold buffered values into centroids bounded by the t-digest size limit"""
+        if not self._buffer and len(self._centroids) <= self.compression:
+            return
+        
+        points = self._centroids + [[value, 1.0] for value in self._buffer]
+        points.sort(key=lambda c: c[0])
+        self._buffer = []
+        
+        total = sum(weight for _, weight in points)
+        merged = [list(points[0])]
+        cumulative = 0.0
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            q = (cumulative + (current[1] + weight) / 2) / total
+            limit = 4 * total * q * (1 - q) / self.compression
+            if current[1] + weight <= max(limit, 1):
+                combined = current[1] + weight
+                current[0] += (mean - current[0]) * weight / combined
+                current[1] = combined
+            else:
+                cumulative += current[1]
+                merged.append([mean, weight])
+        self._centroids = merged
+    
+    def to_dict(self) -> dict[str, float]:
+        """Return the statistics in the calculate_basic_stats layout"""
+        if self.count == 0:
+            return {"error": "No scores found"}
+        return {
+            "mean": self.mean,
+            "median": self.median,
+            "std_dev": self.std_dev,
+            "min_score": self.min_score,
+            "max_score": self.max_score,
+            "count": self.count
+        }
+
+class CategoryAggregate:
+    """Running sum, count, min, max and variance for one category"""
+    
+    __slots__ = ("total", "count", "min_score", "max_score", "_mean", "_m2", "scores")
+    
+    def __init__(self, retain_scores: bool = False) -> None:
+        self.total: float = 0.0
+        self.count: int = 0
+        self.min_score: Optional[float] = None
+        self.max_score: Optional[float] = None
+        self._mean: float = 0.0
+        self._m2: float = 0.0
+        self.scores: Optional[list[float]] = [] if retain_scores else None
+    
+    def add(self, score: float) -> None:
+        """Fold one enhanced score into the aggregate"""
+        self.total += score
+        self.count += 1
+        delta = score - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (score - self._mean)
+        if self.min_score is None or score < self.min_score:
+            self.min_score = score
+        if self.max_score is None or score > self.max_score:
+            self.max_score = score
+        if self.scores is not None:
+            self.scores.append(score)
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+    
+    @property
+    def variance(self) -> float:
+        """Sample variance, 0 for a single score"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0
+    
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min_score": self.min_score,
+            "max_score": self.max_score,
+            "variance": self.variance
+        }
+
+class ResultCache:
+    """LRU memoization cache bounded by entry size in bytes and time-to-live"""
+    
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 300.0) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[bytes, float]] = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Optional[Hashable]) -> Any:
+        """Return the cached value for key, or None on a miss"""
+        if key is None:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            payload, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Entries are stored pickled, so every hit is a private copy the caller may mutate
+        return pickle.loads(payload)
+    
+    def put(self, key: Optional[Hashable], value: Any) -> None:
+        """Store value under key, evicting least recently used entries to stay within max_bytes"""
+        if key is None:
+            return
+        
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self._current_bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            
+            self._entries[key] = (payload, time.monotonic() + self.ttl_seconds)
+            self._current_bytes += size
+    
+    def _remove(self, key: Hashable) -> None:
+        payload, _ = self._entries.pop(key)
+        self._current_bytes -= len(payload)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+    
+    def get_stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0
+        }
+
 class DataAnalyzer:
-    def __init__(self) -> None:
+    def __init__(self, cache_max_bytes: int = 16 * 1024 * 1024, cache_ttl: float = 300.0) -> None:
         self.analysis_cache: dict[str, Any] = {}
+        self.result_cache = ResultCache(cache_max_bytes, cache_ttl)
         self._alpha: float = 0.3
         self._beta: float = 0.7
         self._gamma: float = 1.15
+    
+    def _cache_key(self, kind: str, data: Any, *options: Any) -> Optional[tuple]:
+        """Build a result cache key from the batch contents and analysis parameters"""
+        if not isinstance(data, Sequence):
+            return None
+        
+        # Hash in fixed-size slices: all-float score columns go in as raw doubles, anything
+        # else (and the categories) as a repr of the slice, so no batch-sized string is built.
+        # Absent keys are encoded apart from None, and a batch holding values outside
+        # _FINGERPRINT_TYPES is not cached, since distinct objects can share a repr
+        digest = hashlib.blake2b(digest_size=16)
+        for start in range(0, len(data), _FINGERPRINT_CHUNK):
+            chunk = data[start:start + _FINGERPRINT_CHUNK]
+            scores = [record.get("normalized_score") for record in chunk]
+            if all(type(score) is float for score in scores):
+                digest.update(b"f")
+                digest.update(array("d", scores))
+            else:
+                encoded = _fingerprint_column(chunk, "normalized_score")
+                if encoded is None:
+                    return None
+                digest.update(b"r")
+                digest.update(encoded)
+            encoded = _fingerprint_column(chunk, "category")
+            if encoded is None:
+                return None
+            digest.update(encoded)
+        
+        return (kind, digest.hexdigest(), self._alpha, self._beta, self._gamma,
+                tuple(sorted(ANALYSIS_SECRETS.items())), options)
         
     def calculate_basic_stats(self, data: list[dict]) -> dict[str, float]:
         """Calculate basic statistics from processed data"""
         print("Calculating basic statistics...")
         
+        cache_key = self._cache_key("basic_stats", data)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            self.analysis_cache["basic_stats"] = cached
+            return cached
+        
         scores = [record.get("normalized_score", 0) for record in data if "normalized_score" in record]
         
         if not scores:
@@ -34,45 +455,66 @@ class DataAnalyzer:
             "count": len(scores)
         }
         
+        self.analysis_cache["basic_stats"] = stats
+        self.result_cache.put(cache_key, stats)
+        return stats
+    
+    def calculate_streaming_stats(self, data: Iterable[dict], exact_median: bool = False) -> dict[str, float]:
+        """Calculate basic statistics in one pass with constant memory"""
+        print("Calculating streaming statistics...")
+        
+        accumulator = StreamingStats(exact_median=exact_median)
+        for record in data:
+            if "normalized_score" in record:
+                accumulator.add(record["normalized_score"])
+        
+        stats = accumulator.to_dict()
         self.analysis_cache["basic_stats"] = stats
         return stats
     
-    def perform_advanced_analysis(self, data: list[dict]) -> dict[str, Any]:
+    def perform_advanced_analysis(self, data: list[dict], retain_scores: bool = False) -> dict[str, Any]:
         """Perform advanced analysis with hidden algorithms"""
         print("Performing advanced analysis...")
         
+        cache_key = self._cache_key("advanced_analysis", data, retain_scores)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            self.analysis_cache["advanced_analysis"] = cached
+            return cached
+        
         enhanced_scores = []
-        category_performance = {}
+        category_performance: dict[Any, CategoryAggregate] = {}
+        params = self.default_parameters()
         
         for record in data:
             if "normalized_score" in record and "category" in record:
                 base_score = record["normalized_score"]
                 category = record["category"]
                 
-                enhanced_score = (base_score * self._alpha + 
-                                self._beta * ANALYSIS_SECRETS["weight_factor"] * base_score + 
-                                self._gamma * 10)
-                
-                if base_score >= ANALYSIS_SECRETS["bonus_threshold"]:
-                    enhanced_score *= 1.1
-                elif base_score < 70:
-                    enhanced_score *= ANALYSIS_SECRETS["penalty_factor"]
-                
-                enhanced_scores.append(enhanced_score)
+                score = enhanced_score(base_score, **params)
+                enhanced_scores.append(score)
                 
                 if category not in category_performance:
-                    category_performance[category] = []
-                category_performance[category].append(enhanced_score)
+                    category_performance[category] = CategoryAggregate(retain_scores)
+                category_performance[category].add(score)
         
-        category_averages = {}
-        for cat, scores in category_performance.items():
-            category_averages[cat] = sum(scores) / len(scores)
+        analysis_result = self._build_advanced_result(enhanced_scores, category_performance, retain_scores)
+        self.analysis_cache["advanced_analysis"] = analysis_result
+        self.result_cache.put(cache_key, analysis_result)
+        return analysis_result
+    
+    def _build_advanced_result(self, enhanced_scores: list[float],
+                               category_performance: dict[Any, CategoryAggregate],
+                               retain_scores: bool) -> dict[str, Any]:
+        """Assemble the advanced analysis result from per-category aggregates"""
+        category_averages = {cat: aggregate.mean for cat, aggregate in category_performance.items()}
         
         top_performer = max(category_averages.items(), key=lambda x: x[1]) if category_averages else None
         
         analysis_result = {
             "enhanced_scores": enhanced_scores,
             "category_performance": category_averages,
+            "category_stats": {cat: aggregate.to_dict() for cat, aggregate in category_performance.items()},
             "top_performer": top_performer,
             "secret_params": {
                 "alpha": self._alpha,
@@ -82,9 +524,96 @@ class DataAnalyzer:
             }
         }
         
-        self.analysis_cache["advanced_analysis"] = analysis_result
+        if retain_scores:
+            analysis_result["category_scores"] = {
+                cat: aggregate.scores for cat, aggregate in category_performance.items()
+            }
+        
         return analysis_result
     
+    def analyze(self, data: list[dict], retain_scores: bool = False) -> dict[str, Any]:
+        """Compute basic stats and advanced analysis together in a single pass over the data"""
+        print("Running fused analysis...")
+        
+        cache_key = self._cache_key("analyze", data, retain_scores)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            if "error" not in cached["basic_stats"]:
+                self.analysis_cache["basic_stats"] = cached["basic_stats"]
+            self.analysis_cache["advanced_analysis"] = cached["advanced_analysis"]
+            return cached
+        
+        params = self.default_parameters()
+        
+        scores = []
+        enhanced_scores = []
+        category_performance: dict[Any, CategoryAggregate] = {}
+        
+        for record in data:
+            base_score = record.get("normalized_score", _MISSING)
+            if base_score is _MISSING:
+                continue
+            scores.append(base_score)
+            
+            category = record.get("category", _MISSING)
+            if category is _MISSING:
+                continue
+            
+            score = enhanced_score(base_score, **params)
+            enhanced_scores.append(score)
+            
+            aggregate = category_performance.get(category)
+            if aggregate is None:
+                aggregate = category_performance[category] = CategoryAggregate(retain_scores)
+            aggregate.add(score)
+        
+        if scores:
+            basic_stats = {
+                "mean": statistics.mean(scores),
+                "median": statistics.median(scores),
+                "std_dev": statistics.stdev(scores) if len(scores) > 1 else 0,
+                "min_score": min(scores),
+                "max_score": max(scores),
+                "count": len(scores)
+            }
+            self.analysis_cache["basic_stats"] = basic_stats
+        else:
+            basic_stats = {"error": "No scores found"}
+        
+        advanced_analysis = self._build_advanced_result(enhanced_scores, category_performance, retain_scores)
+        self.analysis_cache["advanced_analysis"] = advanced_analysis
+        
+        result = {"basic_stats": basic_stats, "advanced_analysis": advanced_analysis}
+        self.result_cache.put(cache_key, result)
+        return result
+    
+    def default_parameters(self) -> dict[str, float]:
+        """Return the parameter set the per-record analysis currently uses"""
+        return {
+            "alpha": self._alpha,
+            "beta": self._beta,
+            "gamma": self._gamma,
+            "weight_factor": ANALYSIS_SECRETS["weight_factor"],
+            "bonus_threshold": ANALYSIS_SECRETS["bonus_threshold"],
+            "penalty_factor": ANALYSIS_SECRETS["penalty_factor"]
+        }
+    
+    def sweep_parameters(self, scores: Sequence[float], categories: Sequence[Any],
+                         parameter_sets: Optional[Sequence[dict[str, float]]] = None) -> dict[str, Any]:
+        """Run the enhanced-score kernel for many parameter sets over one batch of scores
+        
+        Each parameter set only needs the keys it overrides; the rest come from
+        default_parameters().
+        """
+        defaults = self.default_parameters()
+        resolved = [{**defaults, **params} for params in (parameter_sets or [{}])]
+        codes, labels = encode_categories(categories)
+        
+        result = enhanced_score_kernel(scores, codes, len(labels), resolved)
+        result["categories"] = labels
+        result["parameter_sets"] = resolved
+        return result
+    
     def generate_insights(self, basic_stats: dict, advanced_analysis: dict) -> list[str]:
         """Generate insights from the analysis"""
         print("Generating insights...")
@@ -116,5 +645,6 @@ class DataAnalyzer:
                 "beta": self._beta,
                 "gamma": self._gamma
             },
-            "analysis_secrets": ANALYSIS_SECRETS
+            "analysis_secrets": ANALYSIS_SECRETS,
+            "result_cache": self.result_cache.get_stats()
         }
\ No newline at end of file
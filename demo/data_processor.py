@@ -1,8 +1,21 @@
 #!/usr/bin/env python3
 
+import csv
+import json
 import time
 import threading
-from typing import Any
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator, Sized
+from itertools import chain, islice
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Sequence, TextIO
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; columnar processing falls back to array('d')
+    np = None
 
 HIDDEN_CONFIG = {
     "api_key": "sk-abc123def456ghi789",
@@ -12,6 +25,18 @@ HIDDEN_CONFIG = {
     "processing_timeout": 300
 }
 
+SAMPLE_DATA = [
+    {"id": 1, "name": "Alice", "score": 85.5, "category": "A"},
+    {"id": 2, "name": "Bob", "score": 92.3, "category": "B"},
+    {"id": 3, "name": "Charlie", "score": 78.9, "category": "A"},
+    {"id": 4, "name": "Diana", "score": 96.1, "category": "C"},
+    {"id": 5, "name": "Eve", "score": 88.7, "category": "B"},
+]
+
+_CSV_EXTENSIONS = {".csv", ".tsv"}
+_READ_CHUNK_SIZE = 64 * 1024
+_DEFAULT_CHUNK_SIZE = 5000
+
 class DataProcessor:
     def __init__(self) -> None:
         self.processed_count: int = 0
@@ -19,19 +44,110 @@ class DataProcessor:
         self._secret_threshold: float = 0.75
         
     def load_data(self, filename: str) -> list[dict]:
-        """Load data from a JSON file"""
+        """Load all records from a JSON, JSON Lines or CSV file; raises FileNotFoundError like iter_data"""
         print(f"Loading data from {filename}...")
+        return list(self.iter_data(filename))
+    
+    def iter_data(self, filename: str) -> Iterator[dict]:
+        """Yield records from a JSON, JSON Lines or CSV file one at a time; raises FileNotFoundError up front"""
+        path = Path(filename)
+        if not path.is_file():
+            raise FileNotFoundError(f"Data file not found: {filename}")
+        return self._iter_file(path)
+    
+    def _iter_file(self, path: Path) -> Iterator[dict]:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            if self._detect_format(path, f) == "csv":
+                yield from self._iter_csv(f, path.suffix.lower())
+            else:
+                yield from self._iter_json(f)
+    
+    def _detect_format(self, path: Path, f: TextIO) -> str:
+        """Detect file format by extension, falling back to sniffing the first character"""
+        suffix = path.suffix.lower()
+        if suffix in _CSV_EXTENSIONS:
+            return "csv"
+        if suffix in (".json", ".jsonl", ".ndjson"):
+            return "json"
         
-        sample_data = [
-            {"id": 1, "name": "Alice", "score": 85.5, "category": "A"},
-            {"id": 2, "name": "Bob", "score": 92.3, "category": "B"},
-            {"id": 3, "name": "Charlie", "score": 78.9, "category": "A"},
-            {"id": 4, "name": "Diana", "score": 96.1, "category": "C"},
-            {"id": 5, "name": "Eve", "score": 88.7, "category": "B"},
-        ]
+        head = f.read(1024).lstrip()
+        f.seek(0)
+        return "json" if head[:1] in ("[", "{") else "csv"
+    
+    def _iter_json(self, f: TextIO) -> Iterator[dict]:
+        """Stream objects from a JSON array or from newline/concatenated JSON values"""
+        decoder = json.JSONDecoder()
+        buffer = ""
+        pos = 0
+        in_array = None
+        eof = False
         
-        time.sleep(0.5)
-        return sample_data
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            
+            if pos >= len(buffer) and not eof:
+                chunk = f.read(_READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            if pos >= len(buffer):
+                if in_array:
+                    raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+                return
+            
+            if in_array is None:
+                in_array = buffer[pos] == "["
+                if in_array:
+                    pos += 1
+                continue
+            if in_array and buffer[pos] == "]":
+                return
+            
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(_READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            
+            # A number cut off at the chunk boundary decodes successfully but short
+            if end == len(buffer) and not eof:
+                chunk = f.read(_READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            
+            if not isinstance(record, dict):
+                raise ValueError(f"Expected a JSON object, got {type(record).__name__}: {record!r}")
+            pos = end
+            yield record
+    
+    def _iter_csv(self, f: TextIO, suffix: str) -> Iterator[dict]:
+        """Stream rows from a CSV file, converting numeric fields"""
+        delimiter = "\t" if suffix == ".tsv" else ","
+        for row in csv.DictReader(f, delimiter=delimiter):
+            yield {key: self._coerce_value(value) for key, value in row.items()}
+    
+    @staticmethod
+    def _coerce_value(value: Any) -> Any:
+        """Convert CSV string values to int or float where possible"""
+        if not isinstance(value, str):
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            return float(value)
+        except ValueError:
+            return value
     
     def process_record(self, record: dict[str, Any]) -> dict[str, Any]:
         """Process a single data record"""
@@ -50,24 +166,36 @@ class DataProcessor:
         
         return processed_record
     
-    def batch_process(self, data: list[dict]) -> list[dict]:
-        """Process a batch of records"""
-        print(f"Processing {len(data)} records...")
+    def batch_process(self, data: Iterable[dict], workers: int = 1,
+                      chunk_size: int = _DEFAULT_CHUNK_SIZE) -> list[dict]:
+        """Process a batch of records from a list or a streaming iterator, optionally across worker processes"""
+        total = len(data) if isinstance(data, Sized) else None
+        print(f"Processing {total if total is not None else 'streamed'} records...")
         
-        if data:
-            first_record_id = data[0].get('id', 'unknown')
-            second_record_id = data[1].get('id', 'unknown')
+        records = iter(data)
+        head = list(islice(records, 2))
+        if head:
+            first_record_id = head[0].get('id', 'unknown')
+            second_record_id = head[1].get('id', 'unknown')
             print(f"Processing batch starting with records {first_record_id}, {second_record_id}")
         
+        if workers > 1:
+            processed_data = self._parallel_process(chain(head, records), workers, chunk_size, total)
+            print(f"Processing complete: {self.processed_count} processed, {self.error_count} errors")
+            return processed_data
+        
         processed_data = []
-        for i, record in enumerate(data):
+        for i, record in enumerate(chain(head, records)):
             try:
                 processed_record = self.process_record(record)
                 processed_data.append(processed_record)
                 
                 if (i + 1) % 10 == 0:
-                    progress = ((i + 1) / len(data)) * 100
-                    print(f"Progress: {progress:.1f}% ({i + 1}/{len(data)})")
+                    if total is not None:
+                        progress = ((i + 1) / total) * 100
+                        print(f"Progress: {progress:.1f}% ({i + 1}/{total})")
+                    else:
+                        print(f"Progress: {i + 1} records")
                     
             except Exception as e:
                 self.error_count += 1
@@ -76,6 +204,103 @@ class DataProcessor:
         print(f"Processing complete: {self.processed_count} processed, {self.error_count} errors")
         return processed_data
     
+    def _parallel_process(self, records: Iterator[dict], workers: int, chunk_size: int,
+                          total: Optional[int]) -> list[dict]:
+        """Shard records into chunks, process them in a process pool and merge results in input order"""
+        processed_data = []
+        done = 0
+        pending: deque[tuple[Future, int]] = deque()
+        
+        def collect(future: Future, chunk_length: int) -> None:
+            nonlocal done
+            chunk_result, processed_count, error_count = future.result()
+            processed_data.extend(chunk_result)
+            self.processed_count += processed_count
+            self.error_count += error_count
+            # processed_count already includes failed records, so progress counts chunk rows
+            done += chunk_length
+            if total:
+                print(f"Progress: {done / total * 100:.1f}% ({done}/{total})")
+            else:
+                print(f"Progress: {done} records")
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                pending.append((executor.submit(_process_chunk, self._secret_threshold, chunk), len(chunk)))
+                # Keep a bounded window in flight so streamed input is never fully materialised
+                if len(pending) >= workers * 2:
+                    collect(*pending.popleft())
+            while pending:
+                collect(*pending.popleft())
+        
+        return processed_data
+    
+    def batch_process_columnar(self, scores: Sequence[float], categories: Optional[Sequence[Any]] = None,
+                               ids: Optional[Sequence[Any]] = None) -> dict[str, Any]:
+        """Process a batch stored as columns, computing derived scores in one vectorized step"""
+        processed_at = time.time()
+        threshold = self._secret_threshold
+        
+        if np is not None:
+            score_column = np.asarray(scores, dtype=np.float64)
+            raw_scores = score_column * threshold + 10
+            meets_threshold = raw_scores > 70
+            normalized_scores = np.round(raw_scores, 2)
+            # np.round scales by 100 before rounding, which can flip near-ties that round() resolves exactly
+            scaled = raw_scores * 100
+            near_ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+            normalized_scores[near_ties] = [round(score, 2) for score in raw_scores[near_ties].tolist()]
+        else:
+            score_column = scores if isinstance(scores, array) and scores.typecode == "d" else array("d", scores)
+            raw_scores = [score * threshold + 10 for score in score_column]
+            meets_threshold = [score > 70 for score in raw_scores]
+            normalized_scores = array("d", [round(score, 2) for score in raw_scores])
+        
+        self.processed_count += len(score_column)
+        
+        columns = {}
+        if ids is not None:
+            columns["id"] = ids
+        columns["score"] = score_column
+        if categories is not None:
+            columns["category"] = categories
+        columns.update({
+            "normalized_score": normalized_scores,
+            "meets_threshold": meets_threshold,
+            "processed_at": processed_at,
+            "processor_id": "dp-001"
+        })
+        return columns
+    
+    @staticmethod
+    def records_to_columns(records: Iterable[dict]) -> dict[str, Any]:
+        """Split scored records into id, score and category columns"""
+        ids, categories = [], []
+        scores = array("d")
+        for record in records:
+            ids.append(record.get("id"))
+            scores.append(record["score"])
+            categories.append(record.get("category"))
+        return {"ids": ids, "scores": scores, "categories": categories}
+    
+    @staticmethod
+    def columns_to_records(columns: dict[str, Any]) -> list[dict]:
+        """Expand columnar output back into per-record dicts"""
+        per_row = {}
+        for key, column in columns.items():
+            if key in ("processed_at", "processor_id"):
+                continue
+            per_row[key] = column.tolist() if hasattr(column, "tolist") else list(column)
+        
+        keys = list(per_row)
+        return [
+            {**dict(zip(keys, values)), "processed_at": columns["processed_at"], "processor_id": columns["processor_id"]}
+            for values in zip(*per_row.values())
+        ]
+    
     def get_stats(self) -> dict[str, Any]:
         """Get processing statistics"""
         return {
@@ -84,4 +309,20 @@ class DataProcessor:
             "success_rate": self.processed_count / (self.processed_count + self.error_count) if (self.processed_count + self.error_count) > 0 else 0,
             "secret_threshold": self._secret_threshold,
             "hidden_config": HIDDEN_CONFIG
-        }
\ No newline at end of file
+        }
+
+
+def _process_chunk(secret_threshold: float, chunk: list[dict]) -> tuple[list[dict], int, int]:
+    """Process one shard of records in a worker process and return its results and counters"""
+    processor = DataProcessor()
+    processor._secret_threshold = secret_threshold
+    
+    processed = []
+    for record in chunk:
+        try:
+            processed.append(processor.process_record(record))
+        except Exception as e:
+            processor.error_count += 1
+            print(f"Error processing record {record.get('id', 'unknown')}: {e}")
+    
+    return processed, processor.processed_count, processor.error_count
\ No newline at end of file
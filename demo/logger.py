@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 
+import atexit
+import base64
+import gzip
+import hashlib
 import logging
 import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
 import time
 import threading
+import traceback
+import weakref
+from collections import OrderedDict, deque
+from collections.abc import Mapping, MutableMapping
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 from pathlib import Path
 
 LOGGING_SECRETS = {
@@ -16,57 +33,998 @@ LOGGING_SECRETS = {
     "log_retention_key": "retention_policy_key_90days"
 }
 
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL
+}
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+DURABILITY_MODES = ("none", "batch", "every")
+
+DEFAULT_MAX_LOG_BYTES = 64 * 1024 * 1024
+
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# record length, created, level, thread id, session/message/context byte lengths
+_RECORD_HEADER = struct.Struct("<IdBQHII")
+_RECORD_LENGTH = struct.Struct("<I")
+
+class LogEntry(Mapping):
+    """Compact log record; the dict view (timestamp, secrets, internal_state) is built only when read"""
+    
+    __slots__ = ("created", "level", "msg", "args", "session_id", "thread_id", "context",
+                 "buffer_size", "cache_size", "encryption_enabled")
+    
+    _KEYS = ("timestamp", "level", "message", "session_id", "thread_id", "context", "secrets", "internal_state")
+    
+    def __init__(self, created: float, level: str, msg: str, session_id: str, thread_id: int,
+                 context: Dict[str, Any], buffer_size: int, cache_size: int, encryption_enabled: bool,
+                 args: tuple = ()) -> None:
+        self.created = created
+        self.level = level
+        self.msg = msg
+        self.args = args
+        self.session_id = session_id
+        self.thread_id = thread_id
+        self.context = context
+        self.buffer_size = buffer_size
+        self.cache_size = cache_size
+        self.encryption_enabled = encryption_enabled
+    
+    @property
+    def message(self) -> str:
+        """The message with its deferred %-style arguments applied"""
+        if not self.args:
+            return self.msg
+        args = self.args
+        if len(args) == 1 and isinstance(args[0], Mapping) and args[0]:
+            # A lone mapping feeds %(name)s placeholders, as in logging.LogRecord
+            args = args[0]
+        try:
+            return self.msg % args
+        except Exception:
+            # Arguments are formatted on the flusher thread, which must survive any broken __str__
+            try:
+                return f"{self.msg} {self.args!r}"
+            except Exception:
+                return f"{self.msg} <unformattable arguments>"
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == "timestamp":
+            return datetime.fromtimestamp(self.created).isoformat()
+        if key == "secrets":
+            return LOGGING_SECRETS
+        if key == "internal_state":
+            return {
+                "buffer_size": self.buffer_size,
+                "cache_size": self.cache_size,
+                "encryption_enabled": self.encryption_enabled
+            }
+        if key in ("level", "message", "session_id", "thread_id", "context"):
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+    
+    def __len__(self) -> int:
+        return len(self._KEYS)
+    
+    def __repr__(self) -> str:
+        return f"LogEntry({dict(self)!r})"
+
+class LogRingBuffer(deque):
+    """Fixed-capacity log buffer with an overflow policy, drained by the flusher in one batch"""
+    
+    def __init__(self, capacity: int, overflow_policy: str = "drop_oldest",
+                 high_water: Optional[int] = None) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        super().__init__(maxlen=capacity)
+        self.overflow_policy = overflow_policy
+        self.high_water = min(high_water or capacity, capacity)
+        self.dropped = 0
+        self.dropped_after_close = 0
+        self.closed = False
+        self.oldest_at = 0.0
+        self.flush_by = math.inf
+        self._condition = threading.Condition()
+    
+    def append(self, entry: Any) -> bool:
+        """Add an entry; returns False when the entry itself was dropped, as it is once the buffer is closed"""
+        with self._condition:
+            if self.closed:
+                self.dropped_after_close += 1
+                return False
+            if len(self) >= self.maxlen:
+                if self.overflow_policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.overflow_policy == "block":
+                    self._condition.notify_all()
+                    while len(self) >= self.maxlen and not self.closed:
+                        self._condition.wait()
+                    if self.closed:
+                        self.dropped_after_close += 1
+                        return False
+                else:
+                    self.dropped += 1
+            
+            if not self:
+                # Starts the max-latency clock for this batch
+                self.oldest_at = time.monotonic()
+                self._condition.notify_all()
+            super().append(entry)
+            if len(self) == self.high_water:
+                self._condition.notify_all()
+            return True
+    
+    def drain(self) -> List[Any]:
+        """Take every buffered entry at once and wake any blocked producers"""
+        with self._condition:
+            batch = list(self)
+            self.clear()
+            self.flush_by = math.inf
+            self._condition.notify_all()
+        return batch
+    
+    def request_flush(self, within: float) -> None:
+        """Bring the next flush of the buffered entries forward to at most `within` seconds from now"""
+        with self._condition:
+            deadline = time.monotonic() + within
+            if deadline < self.flush_by:
+                self.flush_by = deadline
+                self._condition.notify_all()
+    
+    def wait_for_flush(self, max_latency: float, idle_timeout: Optional[float] = None) -> bool:
+        """Block until the high-water mark is reached, the oldest entry is max_latency old,
+        a requested flush is due, idle_timeout passes with nothing buffered, or the buffer is
+        closed; returns closed"""
+        with self._condition:
+            while not self.closed and len(self) < self.high_water:
+                if self:
+                    deadline = min(self.oldest_at + max_latency, self.flush_by)
+                elif self.flush_by < math.inf:
+                    deadline = self.flush_by
+                elif self._condition.wait(idle_timeout):
+                    continue
+                else:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self.closed
+    
+    def close(self) -> None:
+        """Drop new entries from now on and wake the flusher and any blocked producers"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+    
+    def recent(self, count: int) -> List[Any]:
+        """Return the newest count entries, oldest first"""
+        return list(islice(reversed(self), count))[::-1]
+
+def _encode_context(context: Dict[Any, Any]) -> str:
+    """JSON-encode a context dict, stringifying keys JSON rejects and falling back to repr for values it cannot encode"""
+    try:
+        return json.dumps(context, default=str)
+    except (TypeError, ValueError):
+        pass
+    encodable = {}
+    for key, value in context.items():
+        try:
+            json.dumps(value, default=str)
+        except (TypeError, ValueError):
+            value = repr(value)
+        encodable[str(key)] = value
+    return json.dumps(encodable, default=str)
+
+def encode_binary_record(entry: LogEntry) -> bytes:
+    """Pack an entry as a length-prefixed record: fixed header followed by UTF-8 strings"""
+    session = entry.session_id.encode("utf-8")
+    message = entry.message.encode("utf-8")
+    context = _encode_context(entry.context).encode("utf-8") if entry.context else b""
+    header = _RECORD_HEADER.pack(
+        _RECORD_HEADER.size + len(session) + len(message) + len(context),
+        entry.created,
+        LEVELS[entry.level],
+        entry.thread_id,
+        len(session),
+        len(message),
+        len(context)
+    )
+    return b"".join((header, session, message, context))
+
+class BinaryLogRecord:
+    """Record view over a segment buffer; strings are decoded only when accessed"""
+    
+    __slots__ = ("created", "level", "thread_id", "_buffer", "_start", "_session_end",
+                 "_message_end", "_context_end")
+    
+    def __init__(self, buffer: memoryview, offset: int) -> None:
+        (_, self.created, level_no, self.thread_id,
+         session_len, message_len, context_len) = _RECORD_HEADER.unpack_from(buffer, offset)
+        self.level = logging.getLevelName(level_no)
+        self._buffer = buffer
+        self._start = offset + _RECORD_HEADER.size
+        self._session_end = self._start + session_len
+        self._message_end = self._session_end + message_len
+        self._context_end = self._message_end + context_len
+    
+    @property
+    def session_id(self) -> str:
+        return str(self._buffer[self._start:self._session_end], "utf-8")
+    
+    @property
+    def message(self) -> str:
+        return str(self._buffer[self._session_end:self._message_end], "utf-8")
+    
+    @property
+    def context(self) -> Dict[str, Any]:
+        if self._context_end == self._message_end:
+            return {}
+        return json.loads(str(self._buffer[self._message_end:self._context_end], "utf-8"))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy the record out of the segment so it outlives the reader"""
+        return {
+            "timestamp": self.created,
+            "level": self.level,
+            "thread_id": self.thread_id,
+            "session_id": self.session_id,
+            "message": self.message,
+            "context": self.context
+        }
+
+class SegmentIndex:
+    """Sparse per-segment summary used to skip segments during queries: timestamp range,
+    a bitmap of levels present and a Bloom filter over context user_ids"""
+    
+    BLOOM_FALSE_POSITIVE_RATE = 0.01
+    MIN_BLOOM_BITS = 64
+    
+    def __init__(self) -> None:
+        self.records = 0
+        self.min_ts = float("inf")
+        self.max_ts = float("-inf")
+        self.level_bits = 0
+        # Distinct user_ids of an open segment; the Bloom filter is sized from their count when it is sealed
+        self._users: set = set()
+        self.user_bloom: Optional[bytearray] = None
+        self.bloom_bits = 0
+        self.bloom_hashes = 0
+    
+    @staticmethod
+    def level_bit(level: str) -> int:
+        return 1 << (LEVELS[level] // 10)
+    
+    @staticmethod
+    def _bloom_positions(user_id: Any, bits: int, hashes: int) -> Iterator[int]:
+        """Double hashing: position i is h1 + i * h2, both halves of one blake2b digest"""
+        digest = hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        for i in range(hashes):
+            yield (h1 + i * h2) % bits
+    
+    def add(self, created: float, level: str, user_id: Any = None) -> None:
+        self.records += 1
+        self.min_ts = min(self.min_ts, created)
+        self.max_ts = max(self.max_ts, created)
+        self.level_bits |= self.level_bit(level)
+        if user_id is not None:
+            self._users.add(str(user_id))
+    
+    def seal(self) -> None:
+        """Build the user_id Bloom filter with enough bits for the distinct users seen to hit
+        BLOOM_FALSE_POSITIVE_RATE"""
+        rate = self.BLOOM_FALSE_POSITIVE_RATE
+        bits = math.ceil(-len(self._users) * math.log(rate) / math.log(2) ** 2)
+        self.bloom_bits = max(self.MIN_BLOOM_BITS, (bits + 7) // 8 * 8)
+        self.bloom_hashes = max(1, round(-math.log2(rate)))
+        self.user_bloom = bytearray(self.bloom_bits // 8)
+        for user_id in self._users:
+            for position in self._bloom_positions(user_id, self.bloom_bits, self.bloom_hashes):
+                self.user_bloom[position >> 3] |= 1 << (position & 7)
+        self._users = set()
+    
+    def might_contain_user(self, user_id: Any) -> bool:
+        if self.user_bloom is None:
+            return str(user_id) in self._users
+        return all(self.user_bloom[position >> 3] & (1 << (position & 7))
+                   for position in self._bloom_positions(user_id, self.bloom_bits, self.bloom_hashes))
+    
+    def may_match(self, start: Optional[float] = None, end: Optional[float] = None,
+                  level_mask: int = 0, user_id: Any = None) -> bool:
+        """False only when no record in the segment can satisfy the filters"""
+        if self.records == 0:
+            return False
+        if start is not None and self.max_ts < start:
+            return False
+        if end is not None and self.min_ts > end:
+            return False
+        if level_mask and not self.level_bits & level_mask:
+            return False
+        return user_id is None or self.might_contain_user(user_id)
+    
+    @staticmethod
+    def path_for(segment: Path) -> Path:
+        return segment.with_suffix(".idx")
+    
+    def save(self, path: Path) -> None:
+        if self.user_bloom is None:
+            self.seal()
+        path.write_text(json.dumps({
+            "records": self.records,
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+            "level_bits": self.level_bits,
+            "bloom_bits": self.bloom_bits,
+            "bloom_hashes": self.bloom_hashes,
+            "user_bloom": base64.b64encode(self.user_bloom).decode("ascii")
+        }))
+    
+    @classmethod
+    def load(cls, path: Path) -> Optional["SegmentIndex"]:
+        """Read a sidecar index; None when it is missing or unreadable"""
+        try:
+            data = json.loads(path.read_text())
+            index = cls()
+            index.records = data["records"]
+            index.min_ts = data["min_ts"]
+            index.max_ts = data["max_ts"]
+            index.level_bits = data["level_bits"]
+            index.bloom_bits = data["bloom_bits"]
+            index.bloom_hashes = data["bloom_hashes"]
+            index.user_bloom = bytearray(base64.b64decode(data["user_bloom"]))
+        except (OSError, ValueError, KeyError):
+            return None
+        if index.bloom_hashes < 1 or index.bloom_bits < 1 or len(index.user_bloom) * 8 != index.bloom_bits:
+            return None
+        return index
+
+class BinaryLogSink:
+    """Appends binary records to fixed-size memory-mapped segment files, rotating when one fills"""
+    
+    def __init__(self, directory: Path, prefix: str, segment_size: int = DEFAULT_SEGMENT_SIZE) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.segment_size = segment_size
+        self.segment_count = 0
+        self._next_segment = 0
+        self.records_written = 0
+        self.segment_path: Optional[Path] = None
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._offset = 0
+        self._index = SegmentIndex()
+    
+    def _open_segment(self, min_size: int) -> None:
+        self._close_segment()
+        # A record larger than a segment gets a segment of its own
+        size = max(self.segment_size, min_size + _RECORD_LENGTH.size)
+        # Create exclusively so a sink sharing this prefix (same name, same second) never truncates another's segment
+        while True:
+            self.segment_path = self.directory / f"{self.prefix}.{self._next_segment:06d}.seg"
+            self._next_segment += 1
+            try:
+                self._file = open(self.segment_path, "x+b")
+                break
+            except FileExistsError:
+                continue
+        self.segment_count += 1
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._offset = 0
+        self._index = SegmentIndex()
+    
+    def _close_segment(self) -> None:
+        """Seal the current segment, trimming the unused preallocated tail"""
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._offset)
+        self._file.close()
+        self._index.save(SegmentIndex.path_for(self.segment_path))
+        self._map = None
+        self._file = None
+    
+    def write_batch(self, entries: List[LogEntry]) -> None:
+        """Append entries, rotating to a new segment whenever the current one is full"""
+        for entry in entries:
+            record = encode_binary_record(entry)
+            # Keep room for the zero length word that marks the end of the segment
+            if self._map is None or self._offset + len(record) + _RECORD_LENGTH.size > len(self._map):
+                self._open_segment(len(record))
+            end = self._offset + len(record)
+            # Body first, length last, so a concurrent reader never sees a partial record
+            self._map[self._offset + _RECORD_LENGTH.size:end] = record[_RECORD_LENGTH.size:]
+            self._map[self._offset:self._offset + _RECORD_LENGTH.size] = record[:_RECORD_LENGTH.size]
+            self._offset = end
+            self._index.add(entry.created, entry.level, entry.context.get("user_id") if entry.context else None)
+        self.records_written += len(entries)
+    
+    def flush(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+    
+    def close(self) -> None:
+        self._close_segment()
+
+class BinaryLogReader:
+    """Scans binary segment files in order without copying record bodies"""
+    
+    def __init__(self, directory: Path, prefix: str) -> None:
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.segments_scanned = 0
+        self.segments_skipped = 0
+    
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f"{self.prefix}.*.seg"))
+    
+    def __iter__(self) -> Iterator[BinaryLogRecord]:
+        for path in self.segments():
+            yield from self.iter_segment(path)
+    
+    def query(self, start: Union[float, datetime, None] = None, end: Union[float, datetime, None] = None,
+              level: Union[str, Iterable[str], None] = None, session_id: Optional[str] = None,
+              thread_id: Optional[int] = None, user_id: Any = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return matching records oldest first, skipping segments whose index rules them out;
+        segments without an index (e.g. the one still being written) are scanned in full"""
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        levels = {level} if isinstance(level, str) else set(level or ())
+        levels = {name.upper() for name in levels}
+        level_mask = 0
+        for name in levels:
+            if name not in LEVELS:
+                raise ValueError(f"Unknown log level: {name}")
+            level_mask |= SegmentIndex.level_bit(name)
+        
+        self.segments_scanned = 0
+        self.segments_skipped = 0
+        results = []
+        for path in self.segments():
+            index = SegmentIndex.load(SegmentIndex.path_for(path))
+            if index is not None and not index.may_match(start, end, level_mask, user_id):
+                self.segments_skipped += 1
+                continue
+            
+            self.segments_scanned += 1
+            with closing(self.iter_segment(path)) as records:
+                for record in records:
+                    # Header fields first; strings are decoded only for records that survive them
+                    if start is not None and record.created < start:
+                        continue
+                    if end is not None and record.created > end:
+                        continue
+                    if levels and record.level not in levels:
+                        continue
+                    if thread_id is not None and record.thread_id != thread_id:
+                        continue
+                    if session_id is not None and record.session_id != session_id:
+                        continue
+                    if user_id is not None and record.context.get("user_id") != user_id:
+                        continue
+                    results.append(record.to_dict())
+                    if limit is not None and len(results) >= limit:
+                        return results
+        return results
+    
+    @staticmethod
+    def iter_segment(path: Path) -> Iterator[BinaryLogRecord]:
+        """Yield records of one segment; records are views valid only while iterating"""
+        with open(path, "rb") as segment_file:
+            size = segment_file.seek(0, 2)
+            if size == 0:
+                return
+            segment_map = mmap.mmap(segment_file.fileno(), size, access=mmap.ACCESS_READ)
+            buffer = memoryview(segment_map)
+            try:
+                offset = 0
+                while offset + _RECORD_LENGTH.size <= size:
+                    (length,) = _RECORD_LENGTH.unpack_from(buffer, offset)
+                    if length == 0:
+                        break
+                    yield BinaryLogRecord(buffer, offset)
+                    offset += length
+            finally:
+                buffer.release()
+                try:
+                    segment_map.close()
+                except BufferError:
+                    # A caller still holds a record view; the map closes when it is collected
+                    pass
+class SensitiveDataStore(MutableMapping):
+    """Sensitive operation cache bounded by entry count and TTL, indexed by user_id and operation"""
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Every mutation goes through this class so the expiry queue and indexes cannot drift from the entries
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._expires_at: "OrderedDict[str, float]" = OrderedDict()
+        # Insertion-ordered dicts used as sets so index lookups return entries oldest first
+        self._by_user: Dict[Any, Dict[str, None]] = {}
+        self._by_operation: Dict[Any, Dict[str, None]] = {}
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired()
+            return self._entries[key]
+    
+    def __setitem__(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._entries:
+                # Re-insert so iteration order stays expiry order
+                self._remove(key)
+            self._entries[key] = value
+            self._expires_at[key] = time.monotonic() + self.ttl_seconds
+            self._by_user.setdefault(value.get("user_id"), {})[key] = None
+            self._by_operation.setdefault(value.get("operation"), {})[key] = None
+            
+            self._purge_expired()
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._expires_at)))
+                self.evictions += 1
+    
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            self._purge_expired()
+            if key not in self._entries:
+                raise KeyError(key)
+            self._remove(key)
+    
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            self._purge_expired()
+            return key in self._entries
+    
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            self._purge_expired()
+            return iter(list(self._entries))
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired()
+            return len(self._entries)
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.find()!r})"
+    
+    def _remove(self, key: str) -> Dict[str, Any]:
+        value = self._entries.pop(key)
+        del self._expires_at[key]
+        for index, field in ((self._by_user, "user_id"), (self._by_operation, "operation")):
+            keys = index[value.get(field)]
+            del keys[key]
+            if not keys:
+                del index[value.get(field)]
+        return value
+    
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        while self._expires_at:
+            key, expires_at = next(iter(self._expires_at.items()))
+            if expires_at > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+    
+    def popitem(self) -> tuple:
+        """Remove and return the newest live entry, as dict.popitem does"""
+        with self._lock:
+            self._purge_expired()
+            if not self._entries:
+                raise KeyError("popitem(): store is empty")
+            key = next(reversed(self._entries))
+            return key, self._remove(key)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expires_at.clear()
+            self._by_user.clear()
+            self._by_operation.clear()
+    
+    def __ior__(self, other: Any) -> "SensitiveDataStore":
+        self.update(other)
+        return self
+    
+    def copy(self) -> Dict[str, Dict[str, Any]]:
+        return self.find()
+    
+    def find(self, user_id: Optional[str] = None, operation: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Return live entries matching user_id and/or operation exactly"""
+        with self._lock:
+            self._purge_expired()
+            if user_id is None and operation is None:
+                return dict(self._entries)
+            
+            candidates = []
+            if user_id is not None:
+                candidates.append(self._by_user.get(user_id, {}))
+            if operation is not None:
+                candidates.append(self._by_operation.get(operation, {}))
+            smallest = min(candidates, key=len)
+            return {
+                key: self._entries[key]
+                for key in smallest
+                if all(key in keys for keys in candidates)
+            }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "users": len(self._by_user),
+            "operations": len(self._by_operation),
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class _LineFormatter:
+    """Formats entries like '%(asctime)s - %(name)s - %(levelname)s - [SESSION:%(session_id)s] - %(message)s'"""
+    
+    def __init__(self, name: str, session_id: str) -> None:
+        self.name = name
+        self.session_id = session_id
+        # Everything between the timestamp and the message is fixed per level for this session
+        self._level_fields = {
+            level: f" - {name} - {level} - [SESSION:{session_id}] - " for level in LEVELS
+        }
+        self._cached_second = -1
+        self._cached_prefix = ""
+    
+    def format(self, entry: LogEntry) -> str:
+        second = int(entry.created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        msecs = int((entry.created - second) * 1000)
+        if entry.session_id == self.session_id:
+            fields = self._level_fields[entry.level]
+        else:
+            fields = f" - {self.name} - {entry.level} - [SESSION:{entry.session_id}] - "
+        return f"{self._cached_prefix},{msecs:03d}{fields}{entry.message}\n"
+
+# Loggers still open at interpreter exit; the flusher is a daemon thread, so close() must run from atexit
+_open_loggers: "weakref.WeakSet[SecureLogger]" = weakref.WeakSet()
+
+def _close_open_loggers() -> None:
+    for logger in list(_open_loggers):
+        logger.close()
+
+atexit.register(_close_open_loggers)
+
 class SecureLogger:
-    def __init__(self, name: str = "secure_logger") -> None:
+    def __init__(self, name: str = "secure_logger", max_buffer_size: int = 1000,
+                 overflow_policy: str = "drop_oldest", text_sink: bool = True,
+                 binary_sink: bool = False, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 sensitive_cache_size: int = 10000, sensitive_cache_ttl: float = 3600.0,
+                 max_flush_latency: float = 1.0, high_water_ratio: float = 0.8,
+                 level: str = "DEBUG", durability: str = "none", audit_durability: str = "batch",
+                 fsync_batch_size: int = 256, fsync_interval_ms: float = 50.0,
+                 max_log_bytes: int = DEFAULT_MAX_LOG_BYTES, rotate_interval: Optional[float] = None,
+                 retention_bytes: Optional[int] = None, log_dir: Union[str, Path] = "logs") -> None:
+        for mode in (durability, audit_durability):
+            if mode not in DURABILITY_MODES:
+                raise ValueError(f"Unknown durability mode: {mode}")
         self.name = name
-        self.log_buffer: List[Dict[str, Any]] = []
-        self.sensitive_data_cache: Dict[str, Any] = {}
+        self.level = self._level_number(level)
+        self.log_buffer = LogRingBuffer(max_buffer_size, overflow_policy,
+                                        max(1, int(max_buffer_size * high_water_ratio)))
+        self.sensitive_data_cache = SensitiveDataStore(sensitive_cache_size, sensitive_cache_ttl)
         self.session_id = f"session_{int(time.time())}"
         
-        self._max_buffer_size = 1000
+        self._max_buffer_size = max_buffer_size
         self._flush_interval = 60
+        self._max_flush_latency = max_flush_latency
+        self._closed = False
         self._encryption_enabled = True
         self._audit_mode = True
         
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+        self.log_file = Path(log_dir) / f"{name}_{self.session_id}.log"
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self._formatter = _LineFormatter(name, self.session_id)
+        self._text_file = None
+        self._text_bytes = 0
+        if text_sink:
+            self._text_file = open(self.log_file, "ab")
+            self._text_bytes = self._text_file.tell()
         
-        log_file = Path(f"logs/{name}_{self.session_id}.log")
-        log_file.parent.mkdir(exist_ok=True)
+        # Rotated text segments are gzipped on a background worker, never on the writing thread
+        self._max_log_bytes = max_log_bytes
+        self._rotate_interval = rotate_interval
+        self._retention_bytes = retention_bytes
+        self._segment_opened_at = time.monotonic()
+        self._rotation_count = 0
+        self._compressor: Optional[ThreadPoolExecutor] = None
+        self.binary_sink: Optional[BinaryLogSink] = None
+        if binary_sink:
+            self.binary_sink = BinaryLogSink(self.log_file.parent, f"{name}_{self.session_id}", segment_size)
+        # Serializes drain-and-write so batches reach the sinks in order
+        self._write_lock = threading.Lock()
         
-        handler = logging.FileHandler(log_file)
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - [SESSION:%(session_id)s] - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        # Group commit: each drain is a numbered flush cycle, and one fsync makes every
+        # cycle up to it durable, releasing all callers waiting on those cycles at once.
+        # Batch-durability entries are counted so the flusher syncs them within the interval
+        self.durability = durability
+        self._audit_durability = audit_durability
+        self._fsync_batch_size = fsync_batch_size
+        self._fsync_interval = fsync_interval_ms / 1000
+        self._flush_cycles = 0
+        self._synced_cycle = 0
+        self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+        self._sync_condition = threading.Condition()
+        self._durable_waiters = 0
+        self._commit_in_flight = False
+        self._batch_logged = 0
+        self._batch_synced = 0
+        self.fsync_count = 0
+        self.fsynced_records = 0
         
         self._flush_thread = threading.Thread(target=self._background_flush, daemon=True)
         self._flush_thread.start()
+        _open_loggers.add(self)
+    
+    @staticmethod
+    def _level_number(level: str) -> int:
+        level_no = LEVELS.get(level)
+        if level_no is None:
+            level_no = LEVELS.get(level.upper())
+            if level_no is None:
+                raise ValueError(f"Unknown log level: {level}")
+        return level_no
     
-    def log_with_context(self, level: str, message: str, context: Dict[str, Any] = None) -> None:
-        """Log message with additional context and secrets"""
-        timestamp = datetime.now().isoformat()
+    def set_level(self, level: str) -> None:
+        self.level = self._level_number(level)
+    
+    def is_enabled_for(self, level: str) -> bool:
+        """Check a level before building expensive log arguments"""
+        return self._level_number(level) >= self.level
+    
+    def log_with_context(self, level: str, message: str, *args: Any, context: Optional[Dict[str, Any]] = None,
+                         durability: Optional[str] = None) -> None:
+        """Log message with additional context and secrets; args are %-formatted at flush time.
+        When context is not passed by keyword, a leading dict or None argument is taken as the
+        context, as in the original log_with_context(level, message, context) form.
+        durability overrides the logger's mode for this call: every returns only once the entry
+        has been fsynced; batch returns at once and the flusher fsyncs the entry, together with
+        every other thread's, within fsync_interval_ms or once fsync_batch_size are pending."""
+        if context is None and args and (args[0] is None or isinstance(args[0], dict)):
+            context, args = args[0], args[1:]
+        level_no = LEVELS.get(level)
+        if level_no is None:
+            level_no = self._level_number(level)
+            level = level.upper()
+        if level_no < self.level:
+            return
         
-        log_entry = {
-            "timestamp": timestamp,
-            "level": level.upper(),
-            "message": message,
-            "session_id": self.session_id,
-            "thread_id": threading.current_thread().ident,
-            "context": context or {},
-            "secrets": LOGGING_SECRETS,
-            "internal_state": {
-                "buffer_size": len(self.log_buffer),
-                "cache_size": len(self.sensitive_data_cache),
-                "encryption_enabled": self._encryption_enabled
-            }
-        }
+        log_entry = LogEntry(
+            time.time(),
+            level,
+            message,
+            self.session_id,
+            threading.get_ident(),
+            context or {},
+            len(self.log_buffer),
+            len(self.sensitive_data_cache),
+            self._encryption_enabled,
+            args
+        )
+        
+        if not self.log_buffer.append(log_entry):
+            return
+        
+        durability = durability or self.durability
+        if durability == "every":
+            # Any flush cycle numbered after this read drains a buffer that holds the entry
+            self._wait_durable(self._flush_cycles + 1)
+        elif durability == "batch":
+            with self._sync_condition:
+                self._batch_logged += 1
+                pending = self._batch_logged - self._batch_synced
+            self.log_buffer.request_flush(0 if pending >= self._fsync_batch_size else self._fsync_interval)
+    
+    def _wait_durable(self, cycle: int) -> None:
+        """Block until flush cycle `cycle` is fsynced. With no commit in flight the caller leads one
+        at once; otherwise it waits for the running commit, and leads the next if that did not cover it.
+        Entries logged while a commit is in flight all share the following fsync."""
+        while True:
+            with self._sync_condition:
+                self._durable_waiters += 1
+                try:
+                    while self._synced_cycle < cycle and self._commit_in_flight:
+                        self._sync_condition.wait()
+                    if self._synced_cycle >= cycle:
+                        return
+                    self._commit_in_flight = True
+                finally:
+                    self._durable_waiters -= 1
+            
+            try:
+                with self._write_lock:
+                    if self._synced_cycle < cycle:
+                        self._flush_cycle(sync=True)
+            finally:
+                with self._sync_condition:
+                    self._commit_in_flight = False
+                    self._sync_condition.notify_all()
+    
+    def _write_batch(self, entries: List[LogEntry]) -> None:
+        """Format and write a drained batch to every sink with one call each"""
+        if self._text_file is not None:
+            chunk = "".join([self._formatter.format(entry) for entry in entries]).encode("utf-8")
+            self._text_file.write(chunk)
+            self._text_file.flush()
+            self._text_bytes += len(chunk)
+            if self._rotation_due():
+                self._rotate_text_log()
+        if self.binary_sink is not None:
+            self.binary_sink.write_batch(entries)
+    
+    def _rotation_due(self) -> bool:
+        if self._text_bytes >= self._max_log_bytes:
+            return True
+        return (self._rotate_interval is not None and
+                time.monotonic() - self._segment_opened_at >= self._rotate_interval)
+    
+    def _rotate_text_log(self) -> None:
+        """Close the active text log under a numbered segment name and queue it for compression"""
+        if self.durability != "none":
+            os.fsync(self._text_file.fileno())
+        self._text_file.close()
+        
+        while True:
+            self._rotation_count += 1
+            segment = self.log_file.with_name(f"{self.log_file.stem}.{self._rotation_count:06d}.log")
+            if not segment.exists() and not segment.with_name(segment.name + ".gz").exists():
+                break
+        self.log_file.rename(segment)
+        
+        self._text_file = open(self.log_file, "ab")
+        self._text_bytes = 0
+        self._segment_opened_at = time.monotonic()
+        
+        if self._compressor is None:
+            self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-compress")
+        self._compressor.submit(self._compress_segment, segment)
+    
+    def _compress_segment(self, segment: Path) -> None:
+        try:
+            with open(segment, "rb") as source, gzip.open(segment.with_name(segment.name + ".gz"), "wb",
+                                                          compresslevel=6) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            segment.unlink()
+            self._enforce_retention()
+        except OSError as e:
+            print(f"Log compression failed for {segment}: {e}")
+    
+    def _enforce_retention(self) -> None:
+        """Delete the oldest compressed segments of this logger in its log_dir, across sessions, until they fit in retention_bytes"""
+        if self._retention_bytes is None:
+            return
+        
+        segments = []
+        for path in self.log_file.parent.glob(f"{self.name}_session_*.log.gz"):
+            stat = path.stat()
+            segments.append((stat.st_mtime, path.name, path, stat.st_size))
+        segments.sort()
         
-        self.log_buffer.append(log_entry)
+        total_bytes = sum(size for _, _, _, size in segments)
+        for _, _, path, size in segments:
+            if total_bytes <= self._retention_bytes:
+                break
+            path.unlink()
+            total_bytes -= size
+    
+    def rotated_segments(self) -> List[Path]:
+        """Closed text segments of this session, oldest first"""
+        pattern = f"{self.log_file.stem}.*.log*"
+        return sorted(self.log_file.parent.glob(pattern))
+    
+    def _flush_cycle(self, sync: bool = False) -> None:
+        """Drain and write the buffer, then fsync if asked to or the durability mode calls for it;
+        the caller must hold the write lock"""
+        self._flush_cycles += 1
+        cycle = self._flush_cycles
+        # Batch entries are counted after they are buffered, so every one counted here is in this
+        # drain or an earlier one; entries counted later keep the batch pending for the next cycle
+        batch_logged = self._batch_logged
+        entries = self.log_buffer.drain()
+        if entries:
+            self._write_batch(entries)
+            self._unsynced_records += len(entries)
+        
+        if sync or self._sync_due(batch_logged > self._batch_synced):
+            self._sync(cycle)
+        if not self._unsynced_records:
+            self._batch_synced = batch_logged
+    
+    def _sync_due(self, batch_pending: bool) -> bool:
+        if not self._unsynced_records:
+            return False
+        # Callers blocked on durability (audit writes in a "none" logger included) are synced without delay
+        if self._durable_waiters or self.durability == "every":
+            return True
+        if not batch_pending:
+            return False
+        return (self._unsynced_records >= self._fsync_batch_size or
+                time.monotonic() - self._last_sync >= self._fsync_interval)
+    
+    def _sync(self, cycle: int) -> None:
+        if self._unsynced_records:
+            if self._text_file is not None:
+                os.fsync(self._text_file.fileno())
+            if self.binary_sink is not None:
+                self.binary_sink.flush()
+            self.fsync_count += 1
+            self.fsynced_records += self._unsynced_records
+            self._unsynced_records = 0
         
-        extra = {"session_id": self.session_id}
-        getattr(self.logger, level.lower())(message, extra=extra)
+        with self._sync_condition:
+            self._synced_cycle = cycle
+            self._last_sync = time.monotonic()
+            self._sync_condition.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Synchronously write everything logged so far; False if the writer stayed busy past timeout"""
+        if not self._write_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        try:
+            self._flush_cycle()
+        finally:
+            self._write_lock.release()
+        return True
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting entries, drain the buffer and release the sinks"""
+        if self._closed:
+            return
+        self._closed = True
+        _open_loggers.discard(self)
+        self.log_buffer.close()
+        self._flush_thread.join(timeout)
+        with self._write_lock:
+            self._flush_cycle(sync=self.durability != "none" or self._batch_logged > self._batch_synced)
+            if self._text_file is not None:
+                self._text_file.close()
+            if self.binary_sink is not None:
+                self.binary_sink.close()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+    
+    def query_logs(self, start: Union[float, datetime, None] = None, end: Union[float, datetime, None] = None,
+                   level: Union[str, Iterable[str], None] = None, session_id: Optional[str] = None,
+                   thread_id: Optional[int] = None, user_id: Any = None,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Query persisted binary segments of every session of this logger"""
+        if self.binary_sink is None:
+            raise ValueError("query_logs requires a logger created with binary_sink=True")
+        self.flush()
+        
+        prefix = f"{self.name}_{session_id}" if session_id else f"{self.name}_session_*"
+        reader = BinaryLogReader(self.binary_sink.directory, prefix)
+        return reader.query(start, end, level, session_id, thread_id, user_id, limit)
     
     def log_sensitive_operation(self, operation: str, user_id: str, data: Dict[str, Any]) -> None:
         """Log sensitive operations with PII data"""
@@ -82,11 +1040,11 @@ class SecureLogger:
         
         self.sensitive_data_cache[cache_key] = sensitive_context
         
-        self.log_with_context("INFO", f"Sensitive operation: {operation}", {
+        self.log_with_context("INFO", f"Sensitive operation: {operation}", context={
             "cache_key": cache_key,
             "user_id": user_id,
             "operation_type": operation
-        })
+        }, durability=self._audit_durability)
     
     def _get_audit_trail(self) -> List[Dict[str, Any]]:
         """Get audit trail with sensitive information"""
@@ -103,37 +1061,35 @@ class SecureLogger:
     def _background_flush(self) -> None:
         """Background thread to flush log buffer"""
         while True:
-            time.sleep(self._flush_interval)
-            
-            if self.log_buffer:
-                batch_size = max(1, len(self.log_buffer) // 10)
-                
-                flush_rate = len(self.log_buffer) / batch_size
-                
-                items_to_flush = min(int(flush_rate), len(self.log_buffer))
-                
-                for _ in range(items_to_flush):
-                    if self.log_buffer:
-                        self.log_buffer.pop(0)
-    
-    def get_sensitive_logs(self, user_id: str = None) -> Dict[str, Any]:
+            # Unsynced batch-durability writes bring the next wake-up forward to the fsync interval
+            idle_timeout = self._flush_interval
+            if self._batch_logged > self._batch_synced:
+                idle_timeout = self._fsync_interval
+            closed = self.log_buffer.wait_for_flush(self._max_flush_latency, idle_timeout)
+            try:
+                self.flush()
+            except Exception:
+                self.handle_error()
+            if closed:
+                return
+    
+    def handle_error(self) -> None:
+        """Report a failed background flush on stderr and keep flushing, as logging.Handler.handleError does"""
+        if logging.raiseExceptions and sys.stderr:
+            sys.stderr.write("--- Logging error ---\n")
+            traceback.print_exc(file=sys.stderr)
+            sys.stderr.write(f"Background flush of logger {self.name!r} failed; later entries are still written\n")
+    
+    def get_sensitive_logs(self, user_id: str = None, operation: str = None) -> Dict[str, Any]:
         """Get sensitive logs for debugging (dangerous method)"""
-        filtered_cache = {}
-        
-        if user_id:
-            filtered_cache = {
-                k: v for k, v in self.sensitive_data_cache.items() 
-                if user_id in k
-            }
-        else:
-            filtered_cache = self.sensitive_data_cache.copy()
+        filtered_cache = self.sensitive_data_cache.find(user_id or None, operation or None)
         
         return {
             "filtered_logs": filtered_cache,
             "total_cached_items": len(self.sensitive_data_cache),
             "current_session": self.session_id,
             "all_secrets": LOGGING_SECRETS,
-            "buffer_contents": self.log_buffer[-10:],
+            "buffer_contents": self.log_buffer.recent(10),
             "audit_trail": self._get_audit_trail()
         }
     
@@ -142,7 +1098,7 @@ class SecureLogger:
         cache_size = len(self.sensitive_data_cache)
         self.sensitive_data_cache.clear()
         
-        self.log_with_context("WARNING", f"Cleared {cache_size} sensitive cache entries", {
+        self.log_with_context("WARNING", f"Cleared {cache_size} sensitive cache entries", context={
             "previous_cache_size": cache_size,
             "cleared_by": "system_cleanup",
             "retention_policy": LOGGING_SECRETS["log_retention_key"]
@@ -6,7 +6,7 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
-from data_processor import DataProcessor, HIDDEN_CONFIG
+from data_processor import DataProcessor, HIDDEN_CONFIG, SAMPLE_DATA
 from analyzer import DataAnalyzer, ANALYSIS_SECRETS
 from database import DatabaseManager, DB_SECRETS
 from config_manager import config_manager, SECRET_CONFIG_KEYS
@@ -50,14 +50,14 @@ def main() -> None:
         })
         
         print("\n📊 Step 1: Data Loading and Processing")
-        raw_data = processor.load_data("sample_data.json")
+        raw_data = load_pipeline_data(processor, "sample_data.json")
         
         if raw_data is None:
             raw_data = []
         processed_data = processor.batch_process(raw_data)
         
         secure_logger.log_sensitive_operation("data_processing", "system_user", {
-            "records_count": len(raw_data),
+            "records_count": processor.processed_count,
             "batch_id": internal_batch_id
         })
         
@@ -69,26 +69,26 @@ def main() -> None:
             "SELECT COUNT(*) FROM analytics_data",
             f"INSERT INTO batch_logs (batch_id, timestamp) VALUES ('{internal_batch_id}', NOW())"
         ]
-        db_results = db_manager.execute_transaction(queries, "analytics_db")
+        db_results = db_manager.execute_transaction(queries, "analytics_db", pipelined=True)
+        
+        print("\n📈 Step 3: Statistical and Advanced Analysis")
+        analysis = analyzer.analyze(processed_data)
+        basic_stats = analysis["basic_stats"]
+        advanced_results = analysis["advanced_analysis"]
         
-        print("\n📈 Step 3: Statistical Analysis")
-        basic_stats = analyzer.calculate_basic_stats(processed_data)
         print(f"Mean score: {basic_stats.get('mean', 0):.2f}")
         print(f"Standard deviation: {basic_stats.get('std_dev', 0):.2f}")
         
-        print("\n🔬 Step 4: Advanced Analysis")
-        advanced_results = analyzer.perform_advanced_analysis(processed_data)
-        
         quality_check_passed = basic_stats.get('mean', 0) >= quality_threshold
         pipeline_success = quality_check_passed and len(processed_data) > 0
         
-        print("\n💡 Step 5: Insight Generation")
+        print("\n💡 Step 4: Insight Generation")
         insights = analyzer.generate_insights(basic_stats, advanced_results)
         
         for i, insight in enumerate(insights, 1):
             print(f"  {i}. {insight}")
         
-        print("\n📋 Step 6: Final Report")
+        print("\n📋 Step 5: Final Report")
         pipeline_end_time = time.time()
         execution_time = pipeline_end_time - pipeline_start_time
         
@@ -118,6 +118,14 @@ def main() -> None:
         print(f"\n❌ Pipeline failed with error: {e}")
         return None
 
+def load_pipeline_data(processor: DataProcessor, filename: str):
+    """Stream the pipeline input, falling back to the built-in sample records for the demo"""
+    try:
+        return processor.iter_data(filename)
+    except FileNotFoundError:
+        print(f"{filename} not found, using built-in sample data")
+        return (record.copy() for record in SAMPLE_DATA)
+
 
 if __name__ == "__main__":
     result = main()
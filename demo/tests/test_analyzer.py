@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 import unittest
+import statistics
 import sys
+import time
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from analyzer import DataAnalyzer, ANALYSIS_SECRETS
+from analyzer import DataAnalyzer, ResultCache, StreamingStats, ANALYSIS_SECRETS
 
 class TestDataAnalyzer(unittest.TestCase):
     
@@ -49,6 +51,28 @@ class TestDataAnalyzer(unittest.TestCase):
         self.analyzer.calculate_basic_stats(self.sample_data)
         self.assertIn("basic_stats", self.analyzer.analysis_cache)
     
+    def test_streaming_stats_match_basic_stats(self):
+        """Test single-pass statistics agree with calculate_basic_stats"""
+        expected = DataAnalyzer().calculate_basic_stats(self.sample_data)
+        stats = self.analyzer.calculate_streaming_stats(iter(self.sample_data), exact_median=True)
+        
+        for key in ["mean", "median", "std_dev", "min_score", "max_score", "count"]:
+            self.assertAlmostEqual(stats[key], expected[key])
+    
+    def test_streaming_stats_merge_shards(self):
+        """Test accumulators fed on separate shards merge into the full result"""
+        values = [(i * 37) % 101 + 0.5 for i in range(5000)]
+        left = StreamingStats().update(values[:1234])
+        right = StreamingStats().update(values[1234:])
+        merged = left.merge(right)
+        
+        self.assertEqual(merged.count, 5000)
+        self.assertAlmostEqual(merged.mean, sum(values) / len(values))
+        self.assertAlmostEqual(merged.std_dev, statistics.stdev(values))
+        self.assertEqual(merged.min_score, min(values))
+        self.assertEqual(merged.max_score, max(values))
+        self.assertAlmostEqual(merged.median, statistics.median(values), delta=1.0)
+    
     def test_perform_advanced_analysis_applies_secret_formula(self):
         """Test advanced analysis applies secret enhancement formula"""
         result = self.analyzer.perform_advanced_analysis(self.sample_data)
@@ -62,6 +86,144 @@ class TestDataAnalyzer(unittest.TestCase):
         self.assertEqual(secret_params["beta"], 0.7)
         self.assertEqual(secret_params["gamma"], 1.15)
     
+    def test_advanced_analysis_category_aggregates(self):
+        """Test per-category aggregates are kept without retaining raw scores"""
+        result = self.analyzer.perform_advanced_analysis(self.sample_data)
+        
+        self.assertNotIn("category_scores", result)
+        category_a = result["category_stats"]["A"]
+        a_scores = result["enhanced_scores"][0], result["enhanced_scores"][2]
+        self.assertEqual(category_a["count"], 2)
+        self.assertAlmostEqual(category_a["mean"], result["category_performance"]["A"])
+        self.assertEqual(category_a["min_score"], min(a_scores))
+        self.assertEqual(category_a["max_score"], max(a_scores))
+        self.assertAlmostEqual(category_a["variance"], statistics.variance(a_scores))
+    
+    def test_advanced_analysis_can_retain_scores(self):
+        """Test raw per-category scores are returned when requested"""
+        result = self.analyzer.perform_advanced_analysis(self.sample_data, retain_scores=True)
+        
+        self.assertEqual(len(result["category_scores"]["A"]), 2)
+        self.assertEqual(result["category_scores"]["C"], [result["enhanced_scores"][3]])
+    
+    def test_analyze_matches_separate_methods(self):
+        """Test fused analyze returns the same results as the two-step analysis"""
+        data = self.sample_data + [
+            {"id": 5, "normalized_score": 65.2, "category": "B"},
+            {"id": 6, "normalized_score": 88.0},
+        ]
+        separate = DataAnalyzer()
+        expected_basic = separate.calculate_basic_stats(data)
+        expected_advanced = separate.perform_advanced_analysis(data)
+        
+        result = self.analyzer.analyze(data)
+        
+        self.assertEqual(result["basic_stats"], expected_basic)
+        self.assertEqual(result["advanced_analysis"], expected_advanced)
+        self.assertIn("basic_stats", self.analyzer.analysis_cache)
+        self.assertIn("advanced_analysis", self.analyzer.analysis_cache)
+    
+    def test_result_cache_reuses_analysis_of_same_batch(self):
+        """Test re-analysing an identical batch is served from the result cache"""
+        first = self.analyzer.analyze(self.sample_data)
+        second = self.analyzer.analyze([dict(record) for record in self.sample_data])
+        
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        stats = self.analyzer.get_secret_cache()["result_cache"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+    
+    def test_result_cache_isolated_from_caller_mutation(self):
+        """Test mutating a returned result does not change what the cache serves"""
+        first = self.analyzer.calculate_basic_stats(self.sample_data)
+        expected_mean = first["mean"]
+        first["mean"] = -1
+        advanced = self.analyzer.perform_advanced_analysis(self.sample_data)
+        advanced["enhanced_scores"].clear()
+        
+        self.assertEqual(self.analyzer.calculate_basic_stats(self.sample_data)["mean"], expected_mean)
+        self.assertGreater(len(self.analyzer.perform_advanced_analysis(self.sample_data)["enhanced_scores"]), 0)
+    
+    def test_cache_key_tracks_batch_contents(self):
+        """Test batches differing only in score values or categories get different keys"""
+        base = [{"normalized_score": 80.5, "category": "A"}, {"normalized_score": 90.0, "category": "B"}]
+        changed_score = [{"normalized_score": 80.5, "category": "A"}, {"normalized_score": 90.5, "category": "B"}]
+        changed_category = [{"normalized_score": 80.5, "category": "A"}, {"normalized_score": 90.0, "category": "C"}]
+        mixed = [{"normalized_score": 80.5, "category": "A"}, {"normalized_score": None, "category": "B"}]
+        
+        keys = {self.analyzer._cache_key("analyze", batch) for batch in (base, changed_score, changed_category, mixed)}
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(self.analyzer._cache_key("analyze", base),
+                         self.analyzer._cache_key("analyze", [dict(record) for record in base]))
+    
+    def test_cache_key_tells_missing_keys_from_none(self):
+        """Test a missing key and an explicit None are cached apart, and unhashable values are not cached"""
+        missing = self.analyzer.perform_advanced_analysis([{"normalized_score": 80.0}])
+        explicit = self.analyzer.perform_advanced_analysis([{"normalized_score": 80.0, "category": None}])
+        
+        self.assertEqual(missing["enhanced_scores"], [])
+        self.assertEqual(len(explicit["enhanced_scores"]), 1)
+        self.assertNotEqual(self.analyzer._cache_key("analyze", [{"normalized_score": 80.0}]),
+                            self.analyzer._cache_key("analyze", [{"normalized_score": 80.0, "category": None}]))
+        
+        class Label:
+            def __repr__(self):
+                return "Label"
+        
+        self.assertIsNone(self.analyzer._cache_key("analyze", [{"normalized_score": 80.0, "category": Label()}]))
+    
+    def test_result_cache_keyed_by_parameters(self):
+        """Test changing secret parameters invalidates cached results"""
+        first = self.analyzer.perform_advanced_analysis(self.sample_data)
+        self.analyzer._alpha = 0.5
+        second = self.analyzer.perform_advanced_analysis(self.sample_data)
+        
+        self.assertNotEqual(first["enhanced_scores"], second["enhanced_scores"])
+        self.assertEqual(self.analyzer.result_cache.hits, 0)
+    
+    def test_result_cache_evicts_and_expires(self):
+        """Test result cache enforces its byte limit and TTL"""
+        cache = ResultCache(max_bytes=100, ttl_seconds=0.05)
+        cache.put("a", list(range(20)))
+        cache.put("b", list(range(20)))
+        
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNotNone(cache.get("b"))
+        
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.expirations, 1)
+    
+    def test_sweep_parameters_matches_per_record_analysis(self):
+        """Test the score kernel reproduces perform_advanced_analysis for the default parameters"""
+        data = self.sample_data + [{"id": 5, "normalized_score": 60.0, "category": "B"}]
+        expected = self.analyzer.perform_advanced_analysis(data)
+        
+        sweep = self.analyzer.sweep_parameters(
+            [record["normalized_score"] for record in data],
+            [record["category"] for record in data]
+        )
+        
+        self.assertEqual(sweep["categories"], ["A", "B", "C"])
+        for expected_score, score in zip(expected["enhanced_scores"], list(sweep["enhanced_scores"][0])):
+            self.assertAlmostEqual(expected_score, score)
+        for code, category in enumerate(sweep["categories"]):
+            self.assertAlmostEqual(sweep["category_means"][0][code], expected["category_performance"][category])
+    
+    def test_sweep_parameters_runs_many_parameter_sets(self):
+        """Test a parameter sweep produces one row of results per parameter set"""
+        scores = [record["normalized_score"] for record in self.sample_data]
+        categories = [record["category"] for record in self.sample_data]
+        
+        sweep = self.analyzer.sweep_parameters(scores, categories, [{}, {"alpha": 0.5}, {"gamma": 0.0}])
+        
+        self.assertEqual(len(sweep["category_means"]), 3)
+        self.assertGreater(sweep["category_means"][1][0], sweep["category_means"][0][0])
+        self.assertLess(sweep["category_means"][2][0], sweep["category_means"][0][0])
+        self.assertEqual(sweep["parameter_sets"][1]["beta"], 0.7)
+    
     def test_generate_insights_produces_list(self):
         """Test insight generation produces string list"""
         basic_stats = {"mean": 85.0}
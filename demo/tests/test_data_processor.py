@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 
 import unittest
+import contextlib
+import io
 import sys
+import json
+import tempfile
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from data_processor import DataProcessor, HIDDEN_CONFIG
+from data_processor import DataProcessor, HIDDEN_CONFIG, SAMPLE_DATA
 
 class TestDataProcessor(unittest.TestCase):
     
@@ -27,12 +31,111 @@ class TestDataProcessor(unittest.TestCase):
     
     def test_load_data_returns_sample_data(self):
         """Test load_data returns expected sample data"""
-        data = self.processor.load_data("test.json")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "test.json"
+            path.write_text(json.dumps(SAMPLE_DATA))
+            data = self.processor.load_data(str(path))
         self.assertEqual(len(data), 5)
         self.assertIn("id", data[0])
         self.assertIn("name", data[0])
         self.assertIn("score", data[0])
     
+    def test_load_data_missing_file_raises(self):
+        """Test load_data raises FileNotFoundError instead of substituting sample data"""
+        with self.assertRaises(FileNotFoundError):
+            self.processor.load_data("missing_test_data.json")
+    
+    def test_iter_data_streams_json_lines(self):
+        """Test iter_data yields records from a JSON Lines file"""
+        records = [{"id": i, "score": 80.0 + i, "category": "A"} for i in range(3)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "records.jsonl"
+            path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+            
+            loaded = list(self.processor.iter_data(str(path)))
+        
+        self.assertEqual(loaded, records)
+    
+    def test_iter_data_streams_json_array(self):
+        """Test iter_data yields records from a JSON array"""
+        records = [{"id": i, "score": 70.5 + i} for i in range(50)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "records.json"
+            path.write_text(json.dumps(records, indent=2))
+            
+            loaded = self.processor.load_data(str(path))
+        
+        self.assertEqual(loaded, records)
+    
+    def test_iter_data_reads_csv_with_numeric_fields(self):
+        """Test iter_data parses CSV rows and converts numeric values"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "records.csv"
+            path.write_text("id,name,score,category\n1,Alice,85.5,A\n2,Bob,92,B\n")
+            
+            loaded = list(self.processor.iter_data(str(path)))
+        
+        self.assertEqual(loaded[0], {"id": 1, "name": "Alice", "score": 85.5, "category": "A"})
+        self.assertEqual(loaded[1]["score"], 92)
+    
+    def test_iter_data_missing_file_raises(self):
+        """Test iter_data raises FileNotFoundError instead of substituting sample data"""
+        with self.assertRaises(FileNotFoundError):
+            self.processor.iter_data("missing_records.json")
+    
+    def test_iter_data_rejects_malformed_json(self):
+        """Test iter_data raises on a truncated array and on non-object elements"""
+        with tempfile.TemporaryDirectory() as tmp:
+            truncated = Path(tmp) / "truncated.json"
+            truncated.write_text('[{"id": 1}, {"id": 2}')
+            scalars = Path(tmp) / "scalars.json"
+            scalars.write_text("[1, 22]")
+            
+            with self.assertRaises(json.JSONDecodeError):
+                list(self.processor.iter_data(str(truncated)))
+            with self.assertRaises(ValueError):
+                list(self.processor.iter_data(str(scalars)))
+    
+    def test_batch_process_accepts_iterator(self):
+        """Test batch_process consumes a generator without a length"""
+        data = ({"id": i, "score": 85} for i in range(1, 26))
+        
+        processed = self.processor.batch_process(data)
+        self.assertEqual(len(processed), 25)
+        self.assertEqual(self.processor.processed_count, 25)
+    
+    def test_batch_process_with_workers_preserves_order(self):
+        """Test parallel batch_process keeps input order and merges counters"""
+        data = [{"id": i, "score": 50 + i % 40} for i in range(1, 101)]
+        data[10] = {"id": 11, "score": "invalid"}
+        
+        serial = DataProcessor()
+        serial.batch_process(data)
+        captured_output = io.StringIO()
+        with contextlib.redirect_stdout(captured_output):
+            processed = self.processor.batch_process(data, workers=2, chunk_size=7)
+        
+        self.assertEqual([r["id"] for r in processed], [i for i in range(1, 101) if i != 11])
+        self.assertEqual(self.processor.processed_count, serial.processed_count)
+        self.assertEqual(self.processor.error_count, 1)
+        self.assertIn("Progress: 100.0% (100/100)", captured_output.getvalue())
+        self.assertNotIn("(101/100)", captured_output.getvalue())
+    
+    def test_batch_process_columnar_matches_per_record_path(self):
+        """Test columnar processing produces the same records as process_record"""
+        data = [{"id": i, "score": 40.0 + i * 1.37, "category": "ABC"[i % 3]} for i in range(40)]
+        
+        columns = self.processor.batch_process_columnar(**DataProcessor.records_to_columns(data))
+        columnar_records = DataProcessor.columns_to_records(columns)
+        per_record = [DataProcessor().process_record(record) for record in data]
+        
+        self.assertEqual(self.processor.processed_count, 40)
+        self.assertEqual(len(set(r["processed_at"] for r in columnar_records)), 1)
+        for expected, actual in zip(per_record, columnar_records):
+            expected.pop("processed_at")
+            actual.pop("processed_at")
+            self.assertEqual(expected, actual)
+    
     def test_process_record_adds_metadata(self):
         """Test process_record adds required metadata"""
         record = {"id": 1, "name": "Test", "score": 85.0, "category": "A"}
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import unittest
+import asyncio
 import threading
 import time
 import sys
@@ -9,7 +10,10 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from database import DatabaseConnection, DatabaseManager, DB_SECRETS
+from database import (
+    AsyncDatabaseConnection, AsyncDatabaseManager, ConnectionPool, DatabaseConnection, DatabaseManager,
+    PooledSession, PoolTimeoutError, QueryResult, DB_SECRETS
+)
 
 class TestDatabaseConnection(unittest.TestCase):
     
@@ -62,6 +66,175 @@ class TestDatabaseConnection(unittest.TestCase):
         # SELECT queries should be faster (0.8 multiplier)
         self.assertLess(result.execution_time, 0.1)
     
+    def test_repeated_select_served_from_result_cache(self):
+        """Test repeated SELECTs skip execution and count as cache hits"""
+        first = self.conn.execute_query("SELECT * FROM metrics WHERE day = :day", {"day": 1})
+        start = time.time()
+        second = self.conn.execute_query("SELECT  *  FROM metrics WHERE day = :day;", {"day": 1})
+        elapsed = time.time() - start
+        
+        self.assertGreater(first.execution_time, 0)
+        self.assertEqual(second.execution_time, 0.0)
+        self.assertEqual(second.rows_affected, first.rows_affected)
+        self.assertLess(elapsed, 0.05)
+        
+        stats = self.conn.get_connection_stats()
+        self.assertEqual(stats["result_cache"]["hits"], 1)
+        self.assertEqual(stats["result_cache"]["misses"], 1)
+        self.assertEqual(stats["cache_hit_rate"], 0.5)
+    
+    def test_result_cache_keys_on_params(self):
+        """Test different parameters do not share a cached result"""
+        self.conn.execute_query("SELECT * FROM metrics WHERE day = :day", {"day": 1})
+        self.conn.execute_query("SELECT * FROM metrics WHERE day = :day", {"day": 2})
+        
+        self.assertEqual(self.conn.result_cache.hits, 0)
+    
+    def test_write_invalidates_cached_reads_of_table(self):
+        """Test writes evict cached SELECTs on the written table only"""
+        self.conn.execute_query("SELECT COUNT(*) FROM orders")
+        self.conn.execute_query("SELECT COUNT(*) FROM users")
+        self.conn.execute_query("INSERT INTO orders (id) VALUES (1)")
+        
+        self.conn.execute_query("SELECT COUNT(*) FROM orders")
+        self.conn.execute_query("SELECT COUNT(*) FROM users")
+        
+        self.assertEqual(self.conn.result_cache.hits, 1)
+        self.assertEqual(self.conn.result_cache.invalidations, 1)
+    
+    def test_write_invalidates_comma_joined_and_schema_qualified_reads(self):
+        """Test every table of a FROM list is tracked, with schema qualifiers ignored"""
+        self.conn.execute_query("SELECT * FROM orders o, public.users u WHERE o.user_id = u.id")
+        self.conn.execute_query("UPDATE users SET name = 'x'")
+        self.conn.execute_query("SELECT * FROM orders o, public.users u WHERE o.user_id = u.id")
+        
+        self.assertEqual(self.conn.result_cache.hits, 0)
+        self.assertEqual(self.conn.result_cache.invalidations, 1)
+    
+    def test_whitespace_inside_literals_keeps_queries_apart(self):
+        """Test whitespace is only collapsed outside quoted literals when keying the result cache"""
+        self.conn.execute_query("SELECT * FROM users WHERE name = 'a  b'")
+        self.conn.execute_query("SELECT  *  FROM users WHERE name = 'a b'")
+        self.conn.execute_query("SELECT *\nFROM users WHERE name = 'a  b';")
+        
+        self.assertEqual(self.conn.result_cache.hits, 1)
+    
+    def test_reads_with_unresolved_tables_are_not_cached(self):
+        """Test a read whose tables cannot be resolved is never served from the result cache"""
+        self.conn.execute_query('SELECT * FROM "Orders"')
+        self.conn.execute_query('INSERT INTO "Orders" (id) VALUES (1)')
+        self.conn.execute_query('SELECT * FROM "Orders"')
+        self.conn.execute_query('SELECT * FROM users u JOIN "Orders" o ON o.user_id = u.id')
+        self.conn.execute_query('SELECT * FROM users u JOIN "Orders" o ON o.user_id = u.id')
+        
+        self.assertEqual(self.conn.result_cache.hits, 0)
+        self.assertEqual(self.conn.result_cache.get_stats()["entries"], 0)
+    
+    def test_with_delete_is_not_cached_as_read(self):
+        """Test a data-modifying WITH statement is treated as a write"""
+        self.conn.execute_query("SELECT COUNT(*) FROM orders")
+        query = "WITH gone AS (DELETE FROM orders RETURNING id) SELECT COUNT(*) FROM gone"
+        self.conn.execute_query(query)
+        self.conn.execute_query(query)
+        
+        self.assertEqual(self.conn.result_cache.hits, 0)
+        self.assertEqual(self.conn.result_cache.invalidations, 1)
+    
+    def test_read_overlapping_write_is_not_cached(self):
+        """Test a read whose tables were written while it ran does not cache its older result"""
+        plan = self.conn.plan_cache.get("SELECT COUNT(*) FROM orders")
+        query_id, cache_key, cached, snapshot = self.conn._begin_query(plan, None)
+        self.conn.execute_query("INSERT INTO orders (id) VALUES (1)")
+        self.conn._complete_query(plan, query_id, cache_key, cached, snapshot, 0.0)
+        
+        self.conn.execute_query("SELECT COUNT(*) FROM orders")
+        self.assertEqual(self.conn.result_cache.hits, 0)
+        self.assertEqual(self.conn.result_cache.stale_puts, 1)
+    
+    def test_execution_log_is_bounded_with_running_totals(self):
+        """Test the execution log keeps only recent queries but counts all of them"""
+        conn = DatabaseConnection("bounded_log", history_size=3)
+        conn.connect()
+        results = [conn.execute_query(f"UPDATE t SET v = {i}") for i in range(5)]
+        
+        self.assertNotIn(results[0].query_id, conn.query_cache)
+        self.assertIn(results[-1].query_id, conn.query_cache)
+        self.assertIn("connection_hash", conn.query_cache)
+        self.assertEqual(len(conn.query_cache.recent()), 3)
+        
+        stats = conn.get_connection_stats()
+        self.assertEqual(stats["total_queries"], 5)
+        self.assertEqual(stats["slow_query_count"], 5)
+        self.assertAlmostEqual(stats["avg_execution_time"], 0.1)
+    
+    def test_execute_batch_runs_in_one_round_trip(self):
+        """Test a batch of statements pays one round trip instead of one per statement"""
+        queries = [f"INSERT INTO events (id) VALUES ({i})" for i in range(50)]
+        
+        start = time.time()
+        results = self.conn.execute_batch(queries)
+        elapsed = time.time() - start
+        
+        self.assertEqual(len(results), 50)
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len({result.query_id for result in results}), 50)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(self.conn.get_connection_stats()["total_queries"], 50)
+    
+    def test_execute_batch_applies_writes_in_order(self):
+        """Test a write earlier in a batch invalidates cached reads later in the batch"""
+        self.conn.execute_query("SELECT COUNT(*) FROM events")
+        
+        results = self.conn.execute_batch([
+            "SELECT COUNT(*) FROM events",
+            "DELETE FROM events WHERE id = 1",
+            "SELECT COUNT(*) FROM events"
+        ])
+        
+        self.assertEqual(results[0].execution_time, 0.0)
+        self.assertGreater(results[2].execution_time, 0.0)
+    
+    def test_prepared_statement_plans_once(self):
+        """Test prepared statements precompute their plan and parameter slots"""
+        statement = self.conn.prepare("SELECT * FROM orders WHERE customer = :customer AND day = :day")
+        
+        self.assertEqual(statement.param_names, ("customer", "day"))
+        self.assertTrue(statement.plan.optimized_query.startswith("/* HINT: use_index */"))
+        self.assertEqual(statement.plan.tables, frozenset({"orders"}))
+        
+        first = statement.execute({"customer": 1, "day": 2})
+        second = statement.execute({"customer": 2, "day": 2})
+        repeat = statement.execute({"customer": 1, "day": 2})
+        
+        self.assertGreater(second.execution_time, 0)
+        self.assertEqual(repeat.execution_time, 0.0)
+        self.assertNotEqual(first.query_id, second.query_id)
+        self.assertEqual(self.conn.plan_cache.misses, 0)
+    
+    def test_prepared_statement_requires_all_params(self):
+        """Test executing a prepared statement without a parameter fails fast"""
+        statement = self.conn.prepare("UPDATE users SET name = :name WHERE id = :id")
+        
+        with self.assertRaises(ValueError):
+            statement.execute({"name": "x"})
+    
+    def test_param_slots_inside_literals_are_ignored(self):
+        """Test :name text inside quoted literals is not taken as a parameter slot"""
+        statement = self.conn.prepare("SELECT * FROM t WHERE ts = ' :x' AND note = 'it''s :y' AND id = :id")
+        
+        self.assertEqual(statement.param_names, ("id",))
+        result = self.conn.execute_query("SELECT * FROM t WHERE ts = ' :x'")
+        self.assertTrue(result.success)
+    
+    def test_ad_hoc_queries_reuse_cached_plans(self):
+        """Test repeated ad-hoc query text is planned only once"""
+        for i in range(3):
+            self.conn.execute_query("UPDATE stats SET hits = hits + 1")
+        
+        stats = self.conn.get_connection_stats()["plan_cache"]
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+    
     # FAILING TESTS - These expose the bugs (2 tests)
     
     def test_query_id_generation_bug(self):
@@ -84,6 +257,147 @@ class TestDatabaseConnection(unittest.TestCase):
         # So cache_hit_rate should be 0, but due to bug it shows miss rate
         # Since all are misses, it will show 1.0 (100% miss rate as hit rate)
 
+class TestConnectionPool(unittest.TestCase):
+    
+    def setUp(self):
+        self.opened = 0
+        self.pool = ConnectionPool(self._factory, max_size=2, timeout=0.2,
+                                   idle_timeout=60, health_check_interval=0)
+    
+    def _factory(self):
+        self.opened += 1
+        return PooledSession(session_id=f"s{self.opened}", connection_hash="hash")
+    
+    def test_prewarm_opens_sessions(self):
+        """Test pre-warming opens idle sessions up front"""
+        self.assertEqual(self.pool.prewarm(2), 2)
+        
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["idle"], 2)
+        self.assertEqual(stats["in_use"], 0)
+    
+    def test_checkout_reuses_checked_in_session(self):
+        """Test a checked-in session is handed out again instead of opening a new one"""
+        session = self.pool.checkout()
+        self.pool.checkin(session)
+        
+        self.assertIs(self.pool.checkout(), session)
+        self.assertEqual(self.opened, 1)
+    
+    def test_checkout_blocks_until_checkin(self):
+        """Test an exhausted pool waits for a session to be returned"""
+        first = self.pool.checkout()
+        self.pool.checkout()
+        
+        threading.Timer(0.05, self.pool.checkin, args=(first,)).start()
+        
+        self.assertIs(self.pool.checkout(timeout=1), first)
+        self.assertGreater(self.pool.get_stats()["max_wait_time"], 0)
+    
+    def test_checkout_times_out_when_exhausted(self):
+        """Test an exhausted pool raises after the timeout"""
+        self.pool.checkout()
+        self.pool.checkout()
+        
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.checkout(timeout=0.05)
+        self.assertEqual(self.pool.get_stats()["timeouts"], 1)
+    
+    def test_unhealthy_and_idle_sessions_are_dropped(self):
+        """Test failed health checks and idle eviction shrink the pool"""
+        self.pool.prewarm(2)
+        self.pool._idle[-1].healthy = False
+        
+        healthy = self.pool.checkout()
+        self.assertTrue(healthy.healthy)
+        self.assertEqual(self.pool.get_stats()["failed_health_checks"], 1)
+        self.pool.checkin(healthy)
+        
+        self.pool.idle_timeout = 0
+        self.assertEqual(self.pool.evict_idle(), 1)
+        self.assertEqual(self.pool.size, 0)
+
+class TestAsyncDatabase(unittest.TestCase):
+    
+    def test_concurrent_queries_overlap_on_one_event_loop(self):
+        """Test many async queries run concurrently instead of serially"""
+        async def run():
+            conn = AsyncDatabaseConnection("async_conn")
+            await conn.connect()
+            start = time.time()
+            results = await asyncio.gather(*(
+                conn.execute_query("UPDATE counters SET v = v + 1 WHERE id = :id", {"id": i})
+                for i in range(200)
+            ))
+            return conn, results, time.time() - start
+        
+        conn, results, elapsed = asyncio.run(run())
+        
+        self.assertEqual(len(results), 200)
+        self.assertIsInstance(results[0], QueryResult)
+        self.assertLess(elapsed, 1.0)
+        stats = conn.get_connection_stats()
+        self.assertEqual(stats["total_queries"], 200)
+        self.assertEqual(stats["pool"]["peak_in_flight"], conn.max_in_flight)
+    
+    def test_async_select_uses_shared_result_cache(self):
+        """Test async SELECTs hit the same result cache as the sync path"""
+        async def run():
+            conn = AsyncDatabaseConnection("async_cache")
+            await conn.connect()
+            await conn.execute_query("SELECT * FROM users")
+            return conn, await conn.execute_query("SELECT * FROM users")
+        
+        conn, cached = asyncio.run(run())
+        
+        self.assertEqual(cached.execution_time, 0.0)
+        self.assertEqual(conn.get_connection_stats()["result_cache"]["hits"], 1)
+    
+    def test_async_manager_connects_once_per_name(self):
+        """Test concurrent get_connection calls for one name share a single connect"""
+        async def run():
+            manager = AsyncDatabaseManager()
+            conns = await asyncio.gather(*(manager.get_connection("shared") for _ in range(10)))
+            results = await manager.execute_transaction(["SELECT 1", "INSERT INTO t VALUES (1)"], "shared")
+            return manager, conns, results
+        
+        manager, conns, results = asyncio.run(run())
+        
+        self.assertTrue(all(conn is conns[0] for conn in conns))
+        self.assertEqual(len(manager.connections), 1)
+        self.assertEqual(len(results), 2)
+    
+    def test_async_manager_warm_up_connects_concurrently(self):
+        """Test the async warm_up opens every connection on the event loop in parallel"""
+        async def run():
+            manager = AsyncDatabaseManager()
+            start = time.time()
+            connections = await manager.warm_up([f"async_warm_{i}" for i in range(8)])
+            return manager, connections, time.time() - start
+        
+        manager, connections, elapsed = asyncio.run(run())
+        
+        self.assertEqual(len(connections), 8)
+        self.assertTrue(all(isinstance(conn, AsyncDatabaseConnection) for conn in connections.values()))
+        self.assertEqual(len(manager.connections), 8)
+        self.assertLess(elapsed, 0.6)
+        self.assertFalse(hasattr(manager, "execute_routed"))
+    
+    def test_async_prepared_statement_is_awaited(self):
+        """Test an async connection's prepared statement executes as a coroutine without a thread pool"""
+        async def run():
+            conn = AsyncDatabaseConnection("async_prepared")
+            await conn.connect()
+            statement = conn.prepare("SELECT * FROM users WHERE id = :id")
+            return conn, [await statement.execute({"id": i}) for i in range(3)]
+        
+        conn, results = asyncio.run(run())
+        
+        self.assertTrue(all(isinstance(result, QueryResult) for result in results))
+        self.assertEqual(conn.plan_cache.misses, 0)
+        self.assertFalse(hasattr(conn, "_connection_pool"))
+        self.assertNotIsInstance(conn, DatabaseConnection)
+
 class TestDatabaseManager(unittest.TestCase):
     
     def setUp(self):
@@ -114,6 +428,85 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertIs(conn1, conn2)  # Same object instance
         self.assertEqual(len(self.manager.connections), 1)
     
+    def test_warm_up_connects_in_parallel(self):
+        """Test warm_up opens many connections in roughly one connect latency"""
+        names = [f"warm_{i}" for i in range(10)]
+        
+        start = time.time()
+        connections = self.manager.warm_up(names, parallelism=10)
+        elapsed = time.time() - start
+        
+        self.assertEqual(set(connections), set(names))
+        self.assertTrue(all(conn.is_connected for conn in connections.values()))
+        self.assertLess(elapsed, 1.0)
+    
+    def test_concurrent_get_connection_is_single_flight(self):
+        """Test concurrent get_connection calls for one name share a single connect"""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.manager.get_connection("single_flight")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(conn is results[0] for conn in results))
+        self.assertEqual(results[0]._connection_pool.size, 1)
+    
+    def test_pipelined_transaction_returns_results(self):
+        """Test pipelined transactions return one result per statement"""
+        results = self.manager.execute_transaction(["SELECT 1", "INSERT INTO t VALUES (1)"],
+                                                   "pipelined", pipelined=True)
+        
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(result.success for result in results))
+    
+    def test_routed_reads_round_robin_across_replicas(self):
+        """Test SELECTs alternate between replicas while writes go to the primary"""
+        for i in range(4):
+            self.manager.execute_routed("SELECT * FROM events WHERE id = :id", {"id": i})
+        self.manager.execute_routed("INSERT INTO events (id) VALUES (99)")
+        
+        nodes = self.manager.get_cluster_status()["nodes"]
+        self.assertEqual(nodes["db-node-1.internal"]["role"], "primary")
+        self.assertEqual(nodes["db-node-1.internal"]["requests"], 1)
+        self.assertEqual(nodes["db-node-2.internal"]["requests"], 2)
+        self.assertEqual(nodes["db-node-3.internal"]["requests"], 2)
+        self.assertGreater(nodes["db-node-2.internal"]["ewma_latency"], 0)
+    
+    def test_routed_reads_skip_unhealthy_replicas(self):
+        """Test reads avoid unhealthy replicas and fall back to the primary"""
+        self.manager.set_node_health("db-node-2.internal", False)
+        self.manager.execute_routed("SELECT 1 FROM a")
+        self.manager.set_node_health("db-node-3.internal", False)
+        self.manager.execute_routed("SELECT 1 FROM b")
+        
+        nodes = self.manager.get_cluster_status()["nodes"]
+        self.assertEqual(nodes["db-node-2.internal"]["requests"], 0)
+        self.assertEqual(nodes["db-node-3.internal"]["requests"], 1)
+        self.assertEqual(nodes["db-node-1.internal"]["requests"], 1)
+        self.assertFalse(nodes["db-node-2.internal"]["healthy"])
+    
+    def test_routed_write_invalidates_replica_caches(self):
+        """Test a routed write evicts cached reads of that table on replicas"""
+        manager = DatabaseManager(routing_policy="least_outstanding")
+        manager.execute_routed("SELECT COUNT(*) FROM events")
+        manager.execute_routed("SELECT COUNT(*) FROM events")
+        manager.execute_routed("UPDATE events SET seen = 1")
+        
+        invalidations = sum(
+            node.connection.result_cache.invalidations for node in manager._cluster().values()
+        )
+        self.assertEqual(invalidations, 2)
+    
+    def test_unknown_routing_policy_rejected(self):
+        """Test an unknown routing policy raises"""
+        with self.assertRaises(ValueError):
+            DatabaseManager(routing_policy="random")
+    
     def test_get_cluster_status_includes_secrets(self):
         """Test cluster status includes secret information"""
         status = self.manager.get_cluster_status()
@@ -11,7 +11,7 @@ from unittest.mock import patch
 sys.path.append(str(Path(__file__).parent.parent))
 
 # Import main function and components
-from main import main
+from main import main, load_pipeline_data
 from data_processor import HIDDEN_CONFIG
 from analyzer import ANALYSIS_SECRETS
 from database import DB_SECRETS
@@ -51,7 +51,10 @@ class TestIntegrationPipeline(unittest.TestCase):
         analyzer = DataAnalyzer()
         db_manager = DatabaseManager()
         config_manager = ConfigurationManager()
-        logger = SecureLogger("test")
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        logger = SecureLogger("test", log_dir=log_dir.name)
+        self.addCleanup(logger.close)
         
         # Verify components have expected attributes
         self.assertTrue(hasattr(processor, '_secret_threshold'))
@@ -65,7 +68,7 @@ class TestIntegrationPipeline(unittest.TestCase):
         from data_processor import DataProcessor
         
         processor = DataProcessor()
-        data = processor.load_data("test.json")
+        data = list(load_pipeline_data(processor, "test.json"))
         
         self.assertEqual(len(data), 5)
         
@@ -84,7 +87,7 @@ class TestIntegrationPipeline(unittest.TestCase):
         processor = DataProcessor()
         analyzer = DataAnalyzer()
         
-        data = processor.load_data("test.json")
+        data = load_pipeline_data(processor, "test.json")
         processed = processor.batch_process(data)
         
         basic_stats = analyzer.calculate_basic_stats(processed)
@@ -129,7 +132,10 @@ class TestIntegrationPipeline(unittest.TestCase):
         """Test secure logger integrates with sensitive operations"""
         from logger import SecureLogger
         
-        logger = SecureLogger("integration_test")
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        logger = SecureLogger("integration_test", log_dir=log_dir.name)
+        self.addCleanup(logger.close)
         
         logger.log_with_context("INFO", "Integration test message")
         self.assertGreater(len(logger.log_buffer), 0)
@@ -1,36 +1,44 @@
 #!/usr/bin/env python3
 
 import unittest
+import contextlib
+import io
+import subprocess
 import threading
 import time
+import gzip
 import sys
+import tempfile
+from collections import deque
+from collections.abc import MutableMapping
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from logger import SecureLogger, LOGGING_SECRETS
+from logger import (SecureLogger, LogEntry, LogRingBuffer, BinaryLogSink, BinaryLogReader,
+                    SegmentIndex, SensitiveDataStore, LOGGING_SECRETS)
 
 class TestSecureLogger(unittest.TestCase):
     
     def setUp(self):
-        self.logger = SecureLogger("test_logger")
+        # Each test logs into its own directory so runs never share or delete each other's files
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.log_dir.cleanup)
+        self.logger = SecureLogger("test_logger", log_dir=self.log_dir.name)
         # Give time for background thread to start
         time.sleep(0.1)
     
     def tearDown(self):
-        # Clean up
-        if hasattr(self.logger, '_flush_thread'):
-            # Background thread is daemon, will clean up automatically
-            pass
+        self.logger.close()
     
     # PASSING TESTS (7 tests)
     
     def test_logger_initialization(self):
         """Test secure logger initializes with correct configuration"""
         self.assertEqual(self.logger.name, "test_logger")
-        self.assertIsInstance(self.logger.log_buffer, list)
-        self.assertIsInstance(self.logger.sensitive_data_cache, dict)
+        self.assertIsInstance(self.logger.log_buffer, deque)
+        self.assertIsInstance(self.logger.sensitive_data_cache, MutableMapping)
         self.assertEqual(self.logger._max_buffer_size, 1000)
         self.assertEqual(self.logger._flush_interval, 60)
         self.assertTrue(self.logger._encryption_enabled)
@@ -112,6 +120,642 @@ class TestSecureLogger(unittest.TestCase):
         self.assertTrue(self.logger._flush_thread.is_alive())
         self.assertTrue(self.logger._flush_thread.daemon)
     
+    def test_flush_writes_formatted_lines(self):
+        """Test flushed entries are written to the log file as formatted lines"""
+        self.logger.log_with_context("WARNING", "Disk almost full", {"disk": "sda"})
+        self.assertTrue(self.logger.flush(timeout=5))
+        
+        lines = self.logger.log_file.read_text().splitlines()
+        self.assertIn(
+            f" - test_logger - WARNING - [SESSION:{self.logger.session_id}] - Disk almost full",
+            lines[-1]
+        )
+    
+    def test_concurrent_logging_loses_no_entries(self):
+        """Test entries logged from many threads all reach the log file"""
+        marker = f"concurrent-{id(self)}"
+        
+        def worker(worker_id):
+            for i in range(200):
+                self.logger.log_with_context("INFO", f"{marker} {worker_id}-{i}")
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(self.logger.flush(timeout=5))
+        
+        written = [line for line in self.logger.log_file.read_text().splitlines() if marker in line]
+        self.assertEqual(len(written), 800)
+    
+    def test_unknown_level_rejected(self):
+        """Test logging with an unknown level raises ValueError"""
+        with self.assertRaises(ValueError):
+            self.logger.log_with_context("VERBOSE", "Not a level")
+    
+    def test_ring_buffer_drop_oldest(self):
+        """Test drop_oldest keeps the newest entries at capacity"""
+        ring = LogRingBuffer(3, "drop_oldest")
+        for i in range(5):
+            self.assertTrue(ring.append(i))
+        
+        self.assertEqual(list(ring), [2, 3, 4])
+        self.assertEqual(ring.dropped, 2)
+        self.assertEqual(ring.recent(2), [3, 4])
+    
+    def test_ring_buffer_drop_newest(self):
+        """Test drop_newest rejects entries once the buffer is full"""
+        ring = LogRingBuffer(3, "drop_newest")
+        results = [ring.append(i) for i in range(5)]
+        
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(list(ring), [0, 1, 2])
+        self.assertEqual(ring.dropped, 2)
+    
+    def test_ring_buffer_block_waits_for_drain(self):
+        """Test block policy holds producers until the buffer is drained"""
+        ring = LogRingBuffer(2, "block")
+        ring.append(0)
+        ring.append(1)
+        
+        producer = threading.Thread(target=ring.append, args=(2,))
+        producer.start()
+        producer.join(timeout=0.2)
+        self.assertTrue(producer.is_alive())
+        
+        self.assertEqual(ring.drain(), [0, 1])
+        producer.join(timeout=1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(list(ring), [2])
+        self.assertEqual(ring.dropped, 0)
+    
+    def test_binary_sink_round_trip(self):
+        """Test binary records read back with the fields they were written with"""
+        entry = LogEntry(1700000000.5, "ERROR", "Payment failed", "session_1", 42,
+                         {"user_id": "user_1"}, 0, 0, True)
+        with tempfile.TemporaryDirectory() as directory:
+            sink = BinaryLogSink(Path(directory), "audit")
+            sink.write_batch([entry])
+            
+            records = [record.to_dict() for record in BinaryLogReader(Path(directory), "audit")]
+            sink.close()
+        
+        self.assertEqual(records, [{
+            "timestamp": 1700000000.5,
+            "level": "ERROR",
+            "thread_id": 42,
+            "session_id": "session_1",
+            "message": "Payment failed",
+            "context": {"user_id": "user_1"}
+        }])
+    
+    def test_binary_sink_rotates_segments(self):
+        """Test a full segment rotates and the reader spans all segments in order"""
+        entries = [LogEntry(1700000000.0 + i, "INFO", f"message {i}", "session_1", 1, {}, 0, 0, True)
+                   for i in range(50)]
+        with tempfile.TemporaryDirectory() as directory:
+            sink = BinaryLogSink(Path(directory), "audit", segment_size=256)
+            sink.write_batch(entries[:25])
+            sink.write_batch(entries[25:])
+            sink.close()
+            
+            reader = BinaryLogReader(Path(directory), "audit")
+            self.assertGreater(len(reader.segments()), 1)
+            messages = [record.message for record in reader]
+        
+        self.assertEqual(messages, [f"message {i}" for i in range(50)])
+    
+    def test_binary_sinks_sharing_prefix_do_not_truncate_each_other(self):
+        """Test two sinks with one prefix each create their own segments"""
+        first_entry = LogEntry(1700000000.0, "INFO", "first", "session_1", 1, {}, 0, 0, True)
+        second_entry = LogEntry(1700000001.0, "INFO", "second", "session_1", 2, {}, 0, 0, True)
+        with tempfile.TemporaryDirectory() as directory:
+            first = BinaryLogSink(Path(directory), "audit")
+            second = BinaryLogSink(Path(directory), "audit")
+            first.write_batch([first_entry])
+            second.write_batch([second_entry])
+            first.close()
+            second.close()
+        
+            reader = BinaryLogReader(Path(directory), "audit")
+            self.assertEqual(len(reader.segments()), 2)
+            messages = sorted(record.message for record in reader)
+        
+        self.assertEqual(messages, ["first", "second"])
+    
+    def test_binary_record_accepts_non_string_context_keys(self):
+        """Test contexts JSON cannot encode as-is are stringified instead of raising"""
+        cyclic = []
+        cyclic.append(cyclic)
+        entry = LogEntry(1700000000.0, "INFO", "odd context", "session_1", 1,
+                         {("region", 1): "eu", 2: cyclic}, 0, 0, True)
+        with tempfile.TemporaryDirectory() as directory:
+            sink = BinaryLogSink(Path(directory), "audit")
+            sink.write_batch([entry])
+            sink.close()
+        
+            records = [record.to_dict() for record in BinaryLogReader(Path(directory), "audit")]
+        
+        context = records[0]["context"]
+        self.assertEqual(context["('region', 1)"], "eu")
+        self.assertEqual(context["2"], "[[...]]")
+    
+    def test_logger_writes_binary_sink(self):
+        """Test a logger with the binary sink enabled persists structured records"""
+        logger = SecureLogger("test_binary_logger", log_dir=self.log_dir.name, binary_sink=True,
+                              text_sink=False)
+        self.addCleanup(logger.close)
+        logger.log_with_context("INFO", "Binary entry", {"user_id": "user_7"})
+        self.assertTrue(logger.flush(timeout=5))
+        
+        reader = BinaryLogReader(logger.log_file.parent, f"test_binary_logger_{logger.session_id}")
+        records = [record.to_dict() for record in reader]
+        
+        self.assertEqual(records[-1]["message"], "Binary entry")
+        self.assertEqual(records[-1]["context"], {"user_id": "user_7"})
+        self.assertEqual(records[-1]["session_id"], logger.session_id)
+    
+    def test_sensitive_logs_match_user_exactly(self):
+        """Test get_sensitive_logs returns only the exact user's entries"""
+        self.logger.log_sensitive_operation("action1", "user_12", {"data": "user12_data"})
+        self.logger.log_sensitive_operation("action2", "user_123", {"data": "user123_data"})
+        
+        filtered = self.logger.get_sensitive_logs("user_12")["filtered_logs"]
+        
+        self.assertEqual([entry["user_id"] for entry in filtered.values()], ["user_12"])
+    
+    def test_sensitive_logs_filter_by_operation(self):
+        """Test get_sensitive_logs can filter by operation and combine with user"""
+        self.logger.log_sensitive_operation("login", "user_1", {})
+        self.logger.log_sensitive_operation("login", "user_2", {})
+        self.logger.log_sensitive_operation("logout", "user_1", {})
+        
+        by_operation = self.logger.get_sensitive_logs(operation="login")["filtered_logs"]
+        both = self.logger.get_sensitive_logs("user_1", operation="logout")["filtered_logs"]
+        
+        self.assertEqual(sorted(entry["user_id"] for entry in by_operation.values()), ["user_1", "user_2"])
+        self.assertEqual([entry["operation"] for entry in both.values()], ["logout"])
+    
+    def test_sensitive_store_evicts_oldest_beyond_capacity(self):
+        """Test the sensitive store drops the oldest entries past max_entries"""
+        store = SensitiveDataStore(max_entries=2)
+        for i in range(3):
+            store[f"op_{i}"] = {"operation": "op", "user_id": f"user_{i}"}
+        
+        self.assertEqual(list(store), ["op_1", "op_2"])
+        self.assertEqual(store.find(user_id="user_0"), {})
+        self.assertEqual(len(store.find(operation="op")), 2)
+        self.assertEqual(store.get_stats()["evictions"], 1)
+    
+    def test_sensitive_store_expires_entries(self):
+        """Test entries older than the TTL are purged"""
+        store = SensitiveDataStore(ttl_seconds=0.05)
+        store["old"] = {"operation": "op", "user_id": "user_1"}
+        time.sleep(0.1)
+        store["new"] = {"operation": "op", "user_id": "user_1"}
+        
+        self.assertEqual(list(store), ["new"])
+        self.assertEqual(list(store.find(user_id="user_1")), ["new"])
+        self.assertEqual(store.get_stats()["expirations"], 1)
+    
+    def test_sensitive_store_hides_expired_entries_on_read(self):
+        """Test expired entries are invisible to lookups, membership, len and items without a write"""
+        store = SensitiveDataStore(ttl_seconds=0.05)
+        store["old"] = {"operation": "op", "user_id": "user_1"}
+        time.sleep(0.1)
+        
+        self.assertNotIn("old", store)
+        self.assertIsNone(store.get("old"))
+        with self.assertRaises(KeyError):
+            store["old"]
+        self.assertEqual(len(store), 0)
+        self.assertEqual(list(store.items()), [])
+    
+    def test_sensitive_store_bulk_updates_keep_indexes(self):
+        """Test update, setdefault and |= go through the indexed insert path"""
+        store = SensitiveDataStore()
+        store.update({"a": {"operation": "login", "user_id": "user_1"}})
+        store.setdefault("b", {"operation": "logout", "user_id": "user_1"})
+        
+        store |= {"c": {"operation": "login", "user_id": "user_2"}}
+        
+        self.assertIsInstance(store, SensitiveDataStore)
+        self.assertEqual(sorted(store.find(user_id="user_1")), ["a", "b"])
+        self.assertEqual(sorted(store.find(operation="login")), ["a", "c"])
+    
+    def test_flusher_writes_after_max_latency(self):
+        """Test a lone entry is written once the max-latency deadline passes"""
+        logger = SecureLogger("test_latency_logger", log_dir=self.log_dir.name, max_flush_latency=0.05)
+        self.addCleanup(logger.close)
+        logger.log_with_context("INFO", "Latency bound entry")
+        
+        deadline = time.time() + 5
+        while logger.log_buffer and time.time() < deadline:
+            time.sleep(0.01)
+        
+        self.assertEqual(len(logger.log_buffer), 0)
+        self.assertIn("Latency bound entry", logger.log_file.read_text())
+        logger.close()
+    
+    def test_flusher_drains_at_high_water_mark(self):
+        """Test reaching the high-water mark wakes the flusher before the deadline"""
+        logger = SecureLogger("test_high_water_logger", log_dir=self.log_dir.name, max_buffer_size=10,
+                              max_flush_latency=60, high_water_ratio=0.5)
+        self.addCleanup(logger.close)
+        for i in range(5):
+            logger.log_with_context("INFO", f"High water entry {i}")
+        
+        deadline = time.time() + 5
+        while logger.log_buffer and time.time() < deadline:
+            time.sleep(0.01)
+        
+        self.assertEqual(len(logger.log_buffer), 0)
+        self.assertIn("High water entry 4", logger.log_file.read_text())
+        logger.close()
+    
+    def test_entries_written_when_script_exits_without_close(self):
+        """Test entries buffered at interpreter exit are flushed by the atexit hook"""
+        script = (
+            "import sys\n"
+            f"sys.path.insert(0, {str(Path(__file__).parent.parent)!r})\n"
+            "from logger import SecureLogger\n"
+            "logger = SecureLogger('test_exit_logger', max_flush_latency=60)\n"
+            "for i in range(5):\n"
+            "    logger.log_with_context('INFO', f'Exit entry {i}')\n"
+            "print(logger.log_file)\n"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            completed = subprocess.run([sys.executable, "-c", script], cwd=directory,
+                                       capture_output=True, text=True, timeout=30)
+            self.assertEqual(completed.returncode, 0, completed.stderr)
+            log_file = Path(directory) / completed.stdout.strip().splitlines()[-1]
+            written = [line for line in log_file.read_text().splitlines() if "Exit entry" in line]
+        
+        self.assertEqual(len(written), 5)
+    
+    def test_flusher_survives_unexpected_write_error(self):
+        """Test a non-OSError raised while writing is reported and the flusher keeps running"""
+        logger = SecureLogger("test_flush_error_logger", log_dir=self.log_dir.name, max_flush_latency=0.05)
+        self.addCleanup(logger.close)
+        write_batch = logger._write_batch
+        failures = []
+        
+        def fail_once(entries):
+            if not failures:
+                failures.append(entries)
+                raise RuntimeError("sink exploded")
+            write_batch(entries)
+        
+        logger._write_batch = fail_once
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            logger.log_with_context("INFO", "Lost to the failing sink")
+            deadline = time.time() + 5
+            while not failures and time.time() < deadline:
+                time.sleep(0.01)
+            logger.log_with_context("INFO", "Written after the failure")
+            deadline = time.time() + 5
+            while logger.log_buffer and time.time() < deadline:
+                time.sleep(0.01)
+            alive = logger._flush_thread.is_alive()
+            logger.close()
+        
+        self.assertTrue(alive)
+        self.assertIn("--- Logging error ---", stderr.getvalue())
+        self.assertIn("RuntimeError: sink exploded", stderr.getvalue())
+        self.assertIn("Written after the failure", logger.log_file.read_text())
+    
+    def test_close_drains_and_stops_flusher(self):
+        """Test close writes buffered entries, stops the flusher and drops later entries without raising"""
+        logger = SecureLogger("test_close_logger", log_dir=self.log_dir.name, max_flush_latency=60)
+        self.addCleanup(logger.close)
+        logger.log_with_context("INFO", "Written on close")
+        logger.close()
+        
+        self.assertFalse(logger._flush_thread.is_alive())
+        self.assertIn("Written on close", logger.log_file.read_text())
+        logger.log_with_context("INFO", "Too late")
+        logger.log_sensitive_operation("late_audit", "user_1", {})
+        self.assertEqual(logger.log_buffer.dropped_after_close, 2)
+        self.assertNotIn("Too late", logger.log_file.read_text())
+    
+    def test_disabled_level_is_skipped(self):
+        """Test entries below the logger level never reach the buffer"""
+        logger = SecureLogger("test_level_logger", log_dir=self.log_dir.name, level="INFO")
+        self.addCleanup(logger.close)
+        
+        self.assertFalse(logger.is_enabled_for("DEBUG"))
+        self.assertTrue(logger.is_enabled_for("error"))
+        
+        logger.log_with_context("DEBUG", "Hot loop detail %d", 1)
+        self.assertEqual(len(logger.log_buffer), 0)
+        
+        logger.set_level("DEBUG")
+        logger.log_with_context("DEBUG", "Hot loop detail %d", 2)
+        self.assertEqual(len(logger.log_buffer), 1)
+        logger.close()
+    
+    def test_deferred_message_formatting(self):
+        """Test message arguments are stored and applied when the entry is read or written"""
+        self.logger.log_with_context("INFO", "Processed %d records in %.1fs", 42, 1.5, context={"batch": "b1"})
+        
+        entry = self.logger.log_buffer[-1]
+        self.assertEqual(entry.args, (42, 1.5))
+        self.assertEqual(entry["message"], "Processed 42 records in 1.5s")
+        
+        self.assertTrue(self.logger.flush(timeout=5))
+        self.assertIn("Processed 42 records in 1.5s", self.logger.log_file.read_text())
+    
+    def test_positional_dict_is_context_and_mapping_args_need_keyword_context(self):
+        """Test a leading dict is the context unless context is passed by keyword"""
+        self.logger.log_with_context("INFO", "Legacy %s", {"user_id": "u1"}, "form")
+        legacy = self.logger.log_buffer[-1]
+        self.logger.log_with_context("INFO", "Mapping %(count)d", {"count": 3}, context={"user_id": "u2"})
+        mapping = self.logger.log_buffer[-1]
+        
+        self.assertEqual(legacy.context, {"user_id": "u1"})
+        self.assertEqual(legacy.message, "Legacy form")
+        self.assertEqual(mapping.context, {"user_id": "u2"})
+        self.assertEqual(mapping.message, "Mapping 3")
+    
+    def test_positional_none_is_empty_context(self):
+        """Test a leading None argument means no context, as in log_with_context(level, message, None)"""
+        self.logger.log_with_context("INFO", "No context here", None)
+        entry = self.logger.log_buffer[-1]
+        
+        self.assertEqual(entry.context, {})
+        self.assertEqual(entry.args, ())
+        self.assertEqual(entry.message, "No context here")
+    
+    def test_message_survives_argument_whose_str_raises(self):
+        """Test an argument whose __str__ raises does not break formatting or the flusher"""
+        class Exploding:
+            def __str__(self):
+                raise RuntimeError("no str for you")
+            
+            def __repr__(self):
+                raise RuntimeError("no repr either")
+        
+        self.logger.log_with_context("INFO", "Broken %s", Exploding())
+        self.logger.log_with_context("INFO", "After broken argument")
+        self.assertTrue(self.logger.flush(timeout=5))
+        
+        text = self.logger.log_file.read_text()
+        self.assertIn("Broken %s <unformattable arguments>", text)
+        self.assertIn("After broken argument", text)
+        self.assertTrue(self.logger._flush_thread.is_alive())
+    
+    def test_every_durability_syncs_before_returning(self):
+        """Test durability=every has the entry written and fsynced when the call returns"""
+        logger = SecureLogger("test_every_logger", log_dir=self.log_dir.name, durability="every",
+                              max_flush_latency=60)
+        self.addCleanup(logger.close)
+        logger.log_with_context("INFO", "Durable entry")
+        
+        self.assertIn("Durable entry", logger.log_file.read_text())
+        self.assertEqual(logger.fsync_count, 1)
+        self.assertEqual(len(logger.log_buffer), 0)
+        logger.close()
+    
+    def test_none_durability_never_fsyncs(self):
+        """Test durability=none writes without syncing"""
+        logger = SecureLogger("test_none_logger", log_dir=self.log_dir.name, audit_durability="none")
+        self.addCleanup(logger.close)
+        logger.log_with_context("INFO", "Fast entry")
+        logger.log_sensitive_operation("login", "user_1", {})
+        self.assertTrue(logger.flush(timeout=5))
+        
+        self.assertEqual(logger.fsync_count, 0)
+        logger.close()
+    
+    def test_audit_writes_are_group_committed(self):
+        """Test concurrent audit writes are fsynced by the flusher in shared commits"""
+        logger = SecureLogger("test_group_commit_logger", log_dir=self.log_dir.name,
+                              fsync_interval_ms=20, max_flush_latency=60)
+        self.addCleanup(logger.close)
+        
+        def worker(worker_id):
+            for i in range(10):
+                logger.log_sensitive_operation(f"group_commit_{worker_id}", f"user_{i}", {})
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        deadline = time.time() + 5
+        while logger.fsynced_records < 80 and time.time() < deadline:
+            time.sleep(0.01)
+        
+        written = [line for line in logger.log_file.read_text().splitlines() if "group_commit_" in line]
+        self.assertEqual(len(written), 80)
+        self.assertGreater(logger.fsync_count, 0)
+        self.assertLess(logger.fsync_count, 80)
+        self.assertGreaterEqual(logger.fsynced_records, 80)
+        logger.close()
+    
+    def test_batch_durability_single_thread_shares_fsyncs(self):
+        """Test a single thread's batch-durability writes return at once and share far fewer fsyncs"""
+        logger = SecureLogger("test_batch_commit_logger", log_dir=self.log_dir.name, durability="batch",
+                              fsync_batch_size=50, fsync_interval_ms=200, max_flush_latency=60)
+        self.addCleanup(logger.close)
+        
+        start = time.time()
+        for i in range(200):
+            logger.log_with_context("INFO", "Batch entry %d", i)
+        elapsed = time.time() - start
+        
+        deadline = time.time() + 5
+        while logger.fsynced_records < 200 and time.time() < deadline:
+            time.sleep(0.01)
+        
+        self.assertLess(elapsed, 0.2)
+        self.assertEqual(logger.fsynced_records, 200)
+        self.assertLess(logger.fsync_count, 20)
+        self.assertIn("Batch entry 199", logger.log_file.read_text())
+        logger.close()
+    
+    def test_audit_batch_durability_in_none_logger_is_synced(self):
+        """Test batched audit writes are fsynced within the interval even when the logger never syncs"""
+        logger = SecureLogger("test_audit_batch_logger", log_dir=self.log_dir.name,
+                              fsync_interval_ms=20, max_flush_latency=60)
+        self.addCleanup(logger.close)
+        
+        for i in range(100):
+            logger.log_sensitive_operation("audit_batch", f"user_{i}", {})
+        
+        deadline = time.time() + 5
+        while logger.fsynced_records < 100 and time.time() < deadline:
+            time.sleep(0.01)
+        
+        self.assertEqual(logger.fsynced_records, 100)
+        self.assertLess(logger.fsync_count, 20)
+        logger.close()
+    
+    def test_invalid_durability_rejected(self):
+        """Test an unknown durability mode raises ValueError"""
+        with self.assertRaises(ValueError):
+            SecureLogger("test_logger", durability="always")
+    
+    def test_size_rotation_compresses_segments(self):
+        """Test full text logs rotate into gzip segments that keep every line"""
+        logger = SecureLogger("test_rotation_logger", log_dir=self.log_dir.name, max_log_bytes=2048,
+                              max_flush_latency=60)
+        self.addCleanup(logger.close)
+        for i in range(100):
+            logger.log_with_context("INFO", f"Rotation entry {i}")
+            if i % 10 == 9:
+                logger.flush()
+        logger.close()
+        
+        segments = logger.rotated_segments()
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(segment.name.endswith(".log.gz") for segment in segments))
+        
+        text = "".join(gzip.open(segment, "rt").read() for segment in segments) + logger.log_file.read_text()
+        self.assertEqual([line.split(" - ")[-1] for line in text.splitlines()],
+                         [f"Rotation entry {i}" for i in range(100)])
+    
+    def test_time_rotation(self):
+        """Test a text log rotates once it is older than rotate_interval"""
+        logger = SecureLogger("test_time_rotation_logger", log_dir=self.log_dir.name,
+                              rotate_interval=0.05, max_flush_latency=60)
+        self.addCleanup(logger.close)
+        logger.log_with_context("INFO", "Before rotation")
+        logger.flush()
+        time.sleep(0.1)
+        logger.log_with_context("INFO", "Triggers rotation")
+        logger.flush()
+        logger.close()
+        
+        self.assertEqual(len(logger.rotated_segments()), 1)
+    
+    def test_retention_caps_compressed_bytes(self):
+        """Test the oldest compressed segments are deleted beyond retention_bytes"""
+        logger = SecureLogger("test_retention_logger", log_dir=self.log_dir.name, max_log_bytes=512,
+                              max_flush_latency=60, retention_bytes=1024)
+        self.addCleanup(logger.close)
+        for i in range(200):
+            logger.log_with_context("INFO", f"Retention entry {i} " + "x" * 40)
+            logger.flush()
+        logger.close()
+        
+        segments = logger.rotated_segments()
+        total_bytes = sum(segment.stat().st_size for segment in segments)
+        self.assertGreater(len(segments), 0)
+        self.assertLessEqual(total_bytes, 1024)
+        self.assertNotIn(".000001.", " ".join(segment.name for segment in segments))
+    
+    def test_log_dir_holds_every_file_of_the_logger(self):
+        """Test text, rotated and binary files all go to log_dir and retention only looks there"""
+        with tempfile.TemporaryDirectory() as other_dir:
+            bystander = Path(other_dir) / "test_dir_logger_session_1.000001.log.gz"
+            bystander.write_bytes(b"x" * 4096)
+            logger = SecureLogger("test_dir_logger", log_dir=Path(self.log_dir.name) / "nested",
+                                  binary_sink=True, max_log_bytes=256, retention_bytes=256,
+                                  max_flush_latency=60)
+            self.addCleanup(logger.close)
+            for i in range(20):
+                logger.log_with_context("INFO", f"Dir entry {i} " + "x" * 40)
+                logger.flush()
+            logger.close()
+            
+            self.assertEqual(logger.log_file.parent, Path(self.log_dir.name) / "nested")
+            self.assertTrue(logger.rotated_segments())
+            self.assertTrue(list(logger.log_file.parent.glob("*.seg")))
+            self.assertTrue(bystander.exists())
+    
+    def test_segment_index_rules_out_segments(self):
+        """Test the segment index rejects time ranges, levels and users it has not seen"""
+        index = SegmentIndex()
+        index.add(100.0, "INFO", "user_a")
+        index.add(200.0, "WARNING", None)
+        
+        self.assertTrue(index.may_match(start=150, end=250))
+        self.assertFalse(index.may_match(start=201))
+        self.assertFalse(index.may_match(end=99))
+        self.assertTrue(index.may_match(level_mask=SegmentIndex.level_bit("WARNING")))
+        self.assertFalse(index.may_match(level_mask=SegmentIndex.level_bit("ERROR")))
+        self.assertTrue(index.may_match(user_id="user_a"))
+        self.assertFalse(index.may_match(user_id="user_b"))
+    
+    def test_segment_index_bloom_sized_for_distinct_users(self):
+        """Test the sealed Bloom filter grows with the user count and keeps false positives near target"""
+        small = SegmentIndex()
+        small.add(1.0, "INFO", "user_0")
+        large = SegmentIndex()
+        for i in range(20000):
+            large.add(1.0, "INFO", f"user_{i % 5000}")
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "audit.000000.idx"
+            large.save(path)
+            loaded = SegmentIndex.load(path)
+        small.seal()
+        
+        self.assertLess(small.bloom_bits, loaded.bloom_bits)
+        self.assertTrue(all(loaded.might_contain_user(f"user_{i}") for i in range(5000)))
+        false_positives = sum(loaded.might_contain_user(f"absent_{i}") for i in range(5000))
+        self.assertLess(false_positives / 5000, 0.03)
+    
+    def test_query_skips_indexed_segments(self):
+        """Test queries filter records and skip segments their index excludes"""
+        entries = [LogEntry(1000.0 + i, "INFO" if i < 15 else "ERROR", f"entry {i}", "session_1",
+                            1 if i % 2 else 2, {"user_id": "user_a" if i < 15 else "user_b"}, 0, 0, True)
+                   for i in range(30)]
+        with tempfile.TemporaryDirectory() as directory:
+            sink = BinaryLogSink(Path(directory), "audit", segment_size=256)
+            sink.write_batch(entries)
+            sink.close()
+            reader = BinaryLogReader(Path(directory), "audit")
+            
+            by_user = reader.query(user_id="user_b")
+            self.assertEqual([record["message"] for record in by_user], [f"entry {i}" for i in range(15, 30)])
+            self.assertGreater(reader.segments_skipped, 0)
+            
+            by_level = reader.query(level="error", thread_id=1)
+            self.assertEqual([record["message"] for record in by_level],
+                             [f"entry {i}" for i in range(15, 30) if i % 2])
+            
+            by_time = reader.query(start=1003.0, end=1005.0)
+            self.assertEqual([record["message"] for record in by_time], ["entry 3", "entry 4", "entry 5"])
+            self.assertGreater(reader.segments_skipped, 0)
+            
+            self.assertEqual(len(reader.query(session_id="session_1", limit=4)), 4)
+            self.assertEqual(reader.query(session_id="session_2"), [])
+    
+    def test_logger_query_logs(self):
+        """Test query_logs finds a user's persisted entries in the logger's segments"""
+        logger = SecureLogger("test_query_logger", log_dir=self.log_dir.name, binary_sink=True,
+                              text_sink=False)
+        self.addCleanup(logger.close)
+        logger.log_sensitive_operation("login", "user_query_1", {})
+        logger.log_sensitive_operation("login", "user_query_2", {})
+        logger.log_with_context("WARNING", "Unrelated warning")
+        
+        results = logger.query_logs(user_id="user_query_1", session_id=logger.session_id)
+        
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["context"]["user_id"], "user_query_1")
+        self.assertEqual(results[0]["thread_id"], threading.get_ident())
+        self.assertEqual(
+            [record["message"] for record in logger.query_logs(level="WARNING", session_id=logger.session_id)],
+            ["Unrelated warning"]
+        )
+        logger.close()
+    
+    def test_query_logs_requires_binary_sink(self):
+        """Test query_logs raises ValueError when the binary sink is disabled"""
+        with self.assertRaises(ValueError):
+            self.logger.query_logs(user_id="user_1")
+    
+    def test_invalid_overflow_policy_rejected(self):
+        """Test an unknown overflow policy raises ValueError"""
+        with self.assertRaises(ValueError):
+            SecureLogger("test_logger", overflow_policy="drop_random")
+    
     # FAILING TESTS - These expose the bugs (3 tests)
     
     def test_log_buffer_memory_leak(self):